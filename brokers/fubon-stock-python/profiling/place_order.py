@@ -3,6 +3,7 @@ import time
 import sys
 import os
 import argparse
+import pickle
 import tomllib
 from pathlib import Path
 
@@ -14,33 +15,54 @@ DEFAULT_CONFIG = BASE_DIR / "config.toml"
 
 
 def load_config(config_path: str | Path) -> dict:
-    """Load configuration from TOML file."""
+    """Load configuration from TOML file, cached as pickle keyed by mtime and size."""
 
     config_path = Path(config_path)
     if not config_path.exists():
         raise SystemExit(f"Config file not found: {config_path}")
+
+    # Must match exactly: an older file copied over config.toml still differs
+    source = config_path.stat()
+    source_key = (source.st_mtime_ns, source.st_size)
+
+    cache_path = config_path.with_suffix(".toml.pkl")
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, config = pickle.load(f)
+        if cached_key == source_key:
+            return config
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        pass
+
     with open(config_path, "rb") as f:
-        return tomllib.load(f)
+        config = tomllib.load(f)
 
+    # The cache holds the API secrets: owner-only, like config.toml should be
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)
+        with open(fd, "wb") as f:
+            pickle.dump((source_key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
 
-def del_order(sdk, order_no, account):
+    return config
 
-    target_order = None
-    orders = sdk.stock.get_order_results(account)
 
-    for order in orders.data:
-        if order.order_no == order_no:
-            target_order = order
+def del_order(sdk, order_result, account):
+    """Cancel an order using the OrderResult returned by place_order."""
+
+    return sdk.stock.cancel_order(account, order_result)
 
-    if target_order is None:
-        return None
-    else:
-        response = sdk.stock.cancel_order(account, target_order)
-        return response
 
+def prepare(config_path: str | Path = None) -> tuple | None:
+    """Load config, login, and build the order once.
 
-def main(enable_timing: bool = True, config_path: str | Path = None):
-    """Execute place_order"""
+    Returns:
+        (sdk, account, order), or None if login failed
+    """
 
     if config_path is None:
         config_path = DEFAULT_CONFIG
@@ -59,7 +81,7 @@ def main(enable_timing: bool = True, config_path: str | Path = None):
 
     if not accounts.is_success:
         print(f"Login failed: {accounts.message}")
-        return
+        return None
 
     order = Order(
         buy_sell=getattr(fubon_neo.constant.BSAction, config["order"]["action"]),
@@ -77,20 +99,46 @@ def main(enable_timing: bool = True, config_path: str | Path = None):
         user_def=None,
     )
 
+    return sdk, accounts.data[0], order
+
+
+def main(
+    enable_timing: bool = True,
+    config_path: str | Path = None,
+    prepared: tuple | None = None,
+):
+    """Execute place_order
+
+    Args:
+        prepared: (sdk, account, order) from prepare(); skips login when given
+    """
+
+    if prepared is None:
+        prepared = prepare(config_path)
+        if prepared is None:
+            return
+
+    sdk, account, order = prepared
+
     if enable_timing:
         start_ns = time.perf_counter_ns()
-        print(f"===START={start_ns}===", file=sys.stderr, flush=True)
-    order_response = sdk.stock.place_order(accounts.data[0], order)
+    order_response = sdk.stock.place_order(account, order)
 
     if enable_timing:
         end_ns = time.perf_counter_ns()
+        # Markers are written after the call so no I/O lands in the window
+        print(f"===START={start_ns}===", file=sys.stderr, flush=True)
         print(f"===END={end_ns}===", file=sys.stderr, flush=True)
         print(f"TOTAL_NS={end_ns - start_ns}", file=sys.stderr, flush=True)
 
-    response = del_order(sdk, order_response.data.order_no, accounts.data[0])
+    if not order_response.is_success:
+        print(f"Place order failed: {order_response.message}", file=sys.stderr)
+        return
+
+    response = del_order(sdk, order_response.data, account)
 
-    if response is None:
-        print("Cancel order failed")
+    if not response.is_success:
+        print(f"Cancel order failed: {response.message}", file=sys.stderr)
 
 
 if __name__ == "__main__":
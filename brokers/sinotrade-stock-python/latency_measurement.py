@@ -1,46 +1,121 @@
+import orjson
 import shioaji as sj
+import os
+import pickle
 import time
 import requests
-import toml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import tomllib
 from datetime import datetime, timezone, timedelta
 import threading
 import logging
-import traceback
+import logging.handlers
+import queue
+import socket
+from pathlib import Path
+from stat import S_ISSOCK
 
 
 logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
 
 # Timeout constants
 ORDER_TIMEOUT = 10
 CANCEL_TIMEOUT = 10
+REPORT_DRAIN_TIMEOUT = 10
+
+# Upper bound on one idle sleep outside trading hours (guards clock changes)
+MAX_IDLE_SLEEP = 300
+
+# Pending latency reports kept while the report endpoint is unreachable
+REPORT_QUEUE_SIZE = 1000
 
 TAIWAN_TZ = timezone(timedelta(hours=8))
 
+# Not exported by the socket module on every Python build (Linux value)
+SO_BUSY_POLL = getattr(socket, "SO_BUSY_POLL", 46)
+
+# Per-order lifecycle, advanced by the callbacks under LatencyMeasurement._cv
+STATE_IDLE = 0
+STATE_SUBMITTED = 1
+STATE_CANCELLED = 2
+STATE_FAILED = 3
+
+# Order states that count as accepted when the callback was missed
+ORDER_SUBMITTED_STATUSES = frozenset(
+    {sj.constant.Status.PreSubmitted, sj.constant.Status.Submitted}
+)
+
+
+def load_config(config_path):
+    """Load TOML config, reusing a pickled copy while the source is unchanged."""
+    config_path = Path(config_path)
+    cache_path = config_path.with_suffix(".toml.pkl")
+
+    # Exact (mtime, size) match rather than "cache is newer": a config swapped
+    # for an older file (cp -p, rsync -t, git checkout) must not hit the cache
+    source = config_path.stat()
+    source_key = (source.st_mtime_ns, source.st_size)
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, config = pickle.load(f)
+        if cached_key == source_key:
+            return config
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        pass
+
+    with open(config_path, "rb") as f:
+        config = tomllib.load(f)
+
+    # Write atomically so a concurrent reader never sees a partial cache; the
+    # cache holds the API secrets, so it is only ever readable by the owner
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)
+        with open(fd, "wb") as f:
+            pickle.dump((source_key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write config cache: {e}")
+
+    return config
+
+
+def make_report_session():
+    """Persistent HTTP session so latency reports reuse one TCP+TLS connection.
+
+    POST is not retried by urllib3 by default; it is allowed here because a
+    report sent twice is harmless, while a report lost to a pooled keep-alive
+    connection the server already closed is not.
+    """
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=1,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.1,
+            allowed_methods=frozenset({"HEAD", "POST"}),
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class LatencyMeasurement:
     """Measures order submission latency for Sinotrade stock trading."""
 
     def __init__(self, config_path="config.toml"):
         """Initialize the latency measurement system."""
-        self.config = toml.load(config_path)
-        self.validate_config()
-        self.api = sj.Shioaji()
-        self.account = None
-
-        self.order_start_time = None
-        self.measured_latency_ms = 0.0
-
-        self.current_trade = None
-        self.current_symbol = None
-        self.current_action_str = None
-        self.current_price = None
-        self.current_quantity = None
-
-        self.order_event = threading.Event()
-        self.cancel_event = threading.Event()
+        self.config = load_config(config_path)
 
         # Cache parsed constants
         self._action_map = {
@@ -68,7 +143,58 @@ class LatencyMeasurement:
             "ShortSelling": sj.constant.StockOrderCond.ShortSelling,
         }
 
-        self.api.set_order_callback(self._order_callback)
+        self.validate_config()
+        # Before the SDK starts its threads so they inherit the placement
+        self._apply_cpu_tuning()
+        self.api = sj.Shioaji()
+        self.account = None
+
+        self.session = make_report_session()
+
+        self._api_url = self.config["api"]["url"]
+        # Only the report worker sends, so one payload dict is refilled per report
+        self._report_payload = {
+            "timestamp": None,
+            "broker": self.config["api"]["broker_name"],
+            "latency_ms": None,
+            "symbol": None,
+            "side": None,
+            "price": None,
+            "volume": None,
+        }
+
+        self.order_start_ns = None
+        self.measured_latency_ns = 0
+
+        self._contract_cache = {}
+
+        self.current_trade = None
+        # Plain string for the callback's "is this ours" check; None when idle
+        self._expected_order_id = None
+        self.current_symbol = None
+        self.current_price = None
+        self.current_quantity = None
+
+        # One condition guards the order state shared with the callback thread
+        self._cv = threading.Condition()
+        self._state = STATE_IDLE
+        self._yield_wait = (
+            self.config.get("tuning", {}).get("wait_strategy", "block") == "yield"
+        )
+
+        # Reports are posted by a worker so HTTP never blocks the callback thread
+        self._report_queue = queue.Queue(maxsize=REPORT_QUEUE_SIZE)
+        self._report_thread = threading.Thread(
+            target=self._report_worker, name="latency-report", daemon=True
+        )
+        self._report_thread.start()
+
+        # Cancels run off the SDK callback thread on one persistent worker
+        self._cancel_queue = queue.SimpleQueue()
+        self._cancel_thread = threading.Thread(
+            target=self._cancel_loop, name="order-cancel", daemon=True
+        )
+        self._cancel_thread.start()
 
     def validate_config(self):
         """Validate configuration on startup."""
@@ -102,116 +228,245 @@ class LatencyMeasurement:
         if self.config["trading_hours"]["interval_seconds"] <= 0:
             raise ValueError("Interval must be positive")
 
+        # Resolve order enums once; the config does not change at runtime
+        order_config = self.config["order"]
+        self._resolved_action = self._resolve_constant(
+            self._action_map, order_config["action"].lower(), "action"
+        )
+        # Report side code, fixed by the configured action
+        self._side_char = "B" if self._resolved_action == sj.constant.Action.Buy else "S"
+        self._resolved_price_type = self._resolve_constant(
+            self._price_type_map, order_config["price_type"], "price type"
+        )
+        self._resolved_order_type = self._resolve_constant(
+            self._order_type_map, order_config["order_type"], "order type"
+        )
+        self._resolved_order_lot = self._resolve_constant(
+            self._order_lot_map, order_config["order_lot"], "order lot"
+        )
+        self._resolved_order_cond = self._resolve_constant(
+            self._order_cond_map, order_config["order_cond"], "order cond"
+        )
+
         logger.info("Configuration validated successfully")
 
+    def _apply_cpu_tuning(self):
+        """Pin the process to a CPU and optionally switch to SCHED_FIFO."""
+        tuning = self.config.get("tuning", {})
+
+        cpu_affinity = tuning.get("cpu_affinity")
+        if cpu_affinity is not None:
+            try:
+                os.sched_setaffinity(0, {cpu_affinity})
+                logger.info(f"Pinned to CPU {cpu_affinity}")
+            except OSError as e:
+                logger.warning(f"Failed to set CPU affinity: {e}")
+
+        priority = tuning.get("sched_fifo_priority")
+        if priority is not None:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+                logger.info(f"Using SCHED_FIFO priority {priority}")
+            except OSError as e:
+                logger.warning(f"Failed to set SCHED_FIFO (needs CAP_SYS_NICE): {e}")
+
+    def _tune_broker_sockets(self):
+        """Set TCP_NODELAY / SO_BUSY_POLL / SO_RCVLOWAT on the SDK's TCP sockets.
+
+        The Shioaji transport is native code, so its sockets are reached
+        through this process's file descriptors rather than Python objects.
+        SO_RCVLOWAT is pinned to 1 (the kernel default, which the SDK could
+        have raised) so a reader wakes on the first byte of an ack.
+        """
+        tuning = self.config.get("tuning", {})
+        tcp_nodelay = tuning.get("tcp_nodelay", False)
+        busy_poll_us = tuning.get("busy_poll_us")
+        if not tcp_nodelay and busy_poll_us is None:
+            return
+
+        tuned = 0
+        for fd in map(int, os.listdir("/proc/self/fd")):
+            try:
+                if not S_ISSOCK(os.fstat(fd).st_mode):
+                    continue
+                sock = socket.socket(fileno=fd)
+            except OSError:
+                continue
+
+            try:
+                if sock.family not in (socket.AF_INET, socket.AF_INET6):
+                    continue
+                if sock.type != socket.SOCK_STREAM:
+                    continue
+                if tcp_nodelay:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if busy_poll_us is not None:
+                    sock.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, busy_poll_us)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVLOWAT, 1)
+                tuned += 1
+            except OSError as e:
+                logger.warning(f"Failed to tune socket fd {fd}: {e}")
+            finally:
+                # The SDK owns the descriptor; never close it from here
+                sock.detach()
+
+        logger.info(f"Tuned {tuned} TCP socket(s)")
+
     def _order_callback(self, stat, msg):
         """Handle order state updates from exchange.
 
+        Only reached for StockOrder events; see _register_order_callback.
+
         Args:
-            stat: OrderState (StockOrder, StockDeal, FuturesOrder, FuturesDeal)
-            msg: dict containing order/deal information
+            stat: OrderState.StockOrder
+            msg: dict containing order information
         """
+        # Timestamp first so lookups and logging stay out of the measurement
+        callback_ns = time.perf_counter_ns()
+
         try:
-            if stat != sj.constant.OrderState.StockOrder:
+            try:
+                operation = msg["operation"]
+                order = msg["order"]
+                op_type = operation["op_type"]
+                op_code = operation["op_code"]
+                order_id = order["id"]
+            except (KeyError, TypeError):
+                logger.warning(f"Malformed order callback: {msg}")
                 return
 
-            operation = msg.get("operation", {})
-            order = msg.get("order", {})
-            op_type = operation.get("op_type", "Unknown")
-            op_code = operation.get("op_code", "")
-            order_id = order.get("id", "N/A")
+            if order_id == self._expected_order_id:
+                # Handle New order (submission)
+                if op_type == "New":
+                    self._handle_order_submitted(operation, order, callback_ns)
+
+                # Handle Cancel order
+                elif op_type == "Cancel":
+                    self._handle_order_cancelled(operation, order)
 
             logger.info(
-                f"Order callback: op_type={op_type}, op_code={op_code}, order_id={order_id}"
+                "Order callback: op_type=%s, op_code=%s, order_id=%s",
+                op_type,
+                op_code,
+                order_id,
             )
 
-            if not self.current_trade or order_id != self.current_trade.order.id:
-                return
+        except Exception:
+            logger.exception("Error in order callback")
 
-            # Handle New order (submission)
-            if op_type == "New":
-                self._handle_order_submitted(operation, order)
+    def _register_order_callback(self):
+        """Install a callback that drops deal/futures events before any handler work."""
 
-            # Handle Cancel order
-            elif op_type == "Cancel":
-                self._handle_order_cancelled(operation, order)
+        # Defaults bind the enum member and handler as locals of the callback
+        def order_cb(
+            stat,
+            msg,
+            _stock_order=sj.constant.OrderState.StockOrder,
+            _handler=self._order_callback,
+        ):
+            if stat is _stock_order:
+                _handler(stat, msg)
 
-        except Exception as e:
-            logger.error(f"Error in order callback: {e}")
-            traceback.print_exc()
+        self.api.set_order_callback(order_cb)
 
-    def _handle_order_submitted(self, operation, order):
+    def _handle_order_submitted(self, operation, order, end_ns):
         """Handle order submission confirmation.
 
-        Stops timing as soon as callback is triggered, then cancels order.
+        Args:
+            end_ns: perf_counter_ns taken on entry to the callback
         """
-        end_time = time.perf_counter()
-        self.measured_latency_ms = (end_time - self.order_start_time) * 1000
-        logger.info(f"Round-trip latency: {self.measured_latency_ms:.2f} ms")
+        latency_ns = end_ns - self.order_start_ns
+        self.measured_latency_ns = latency_ns
+        logger.info("Round-trip latency: %.2f ms", latency_ns / 1_000_000)
 
-        op_code = operation.get("op_code", "")
-        op_msg = operation.get("op_msg", "")
+        op_code = operation["op_code"]
+        op_msg = operation["op_msg"]
 
         # "00" = success, others = fail
         if op_code != "00":
             logger.error(f"Order failed: {op_msg} (op_code: {op_code})")
-            self.order_event.set()
+            self._advance_state(STATE_FAILED)
             return
 
-        if self.current_action_str == "buy":
-            side = "B"
-        else:
-            side = "S"
+        # Cancel first; the report is not time-critical
+        self._cancel_queue.put(self.current_trade)
 
-        self.send_latency_report(
+        self.enqueue_latency_report(
             symbol=self.current_symbol,
-            side=side,
+            side=self._side_char,
             price=self.current_price,
             volume=self.current_quantity,
-            latency_ms=self.measured_latency_ms,
+            latency_ns=latency_ns,
         )
 
-        self.order_event.set()
+        self._advance_state(STATE_SUBMITTED)
 
-        self._cancel_order()
+    def _advance_state(self, state):
+        """Move the order state forward and wake the submitting thread."""
+        with self._cv:
+            if state > self._state:
+                self._state = state
+                if state >= STATE_CANCELLED:
+                    # Order is finished; ignore stray callbacks for it
+                    self._expected_order_id = None
+                self._cv.notify_all()
+
+    def _wait_for_state(self, min_state, timeout):
+        """Wait until the order state reaches min_state; False on timeout.
+
+        "yield" strategy spins on the state with sleep(0) instead of parking on
+        the condition, trading a CPU core for a faster wakeup.
+        """
+        if self._yield_wait:
+            deadline_ns = time.perf_counter_ns() + int(timeout * 1_000_000_000)
+            # Single writer under the GIL, so an unlocked read is safe
+            while self._state < min_state:
+                if time.perf_counter_ns() >= deadline_ns:
+                    return False
+                time.sleep(0)
+            return True
+
+        with self._cv:
+            return self._cv.wait_for(lambda: self._state >= min_state, timeout=timeout)
 
     def _handle_order_cancelled(self, operation, order):
         """Handle order cancellation confirmation."""
-        op_code = operation.get("op_code", "")
-        op_msg = operation.get("op_msg", "")
-        order_id = order.get("id", "N/A")
+        op_code = operation["op_code"]
+        op_msg = operation["op_msg"]
+        order_id = order["id"]
 
         logger.info(f"Order cancel callback: {order_id}")
 
         if op_code == "00":
             logger.info(f"  Order cancelled successfully")
-            self.cancel_event.set()
+            self._advance_state(STATE_CANCELLED)
         else:
             logger.warning(f"  Cancel failed: {op_msg}")
 
-            self.cancel_event.set()
+            self._advance_state(STATE_CANCELLED)
+
+    def _cancel_loop(self):
+        """Cancel queued trades on a long-lived worker thread."""
+        while True:
+            trade = self._cancel_queue.get()
+            self._cancel_order(trade)
 
-    def _cancel_order(self):
+    def _cancel_order(self, trade):
         try:
-            if not self.current_trade:
+            if not trade:
                 return
 
-            result = self.api.cancel_order(self.current_trade)
+            result = self.api.cancel_order(trade)
 
             if result:
-                logger.info(
-                    f"Cancel request sent for order {self.current_trade.order.id}"
-                )
+                logger.info(f"Cancel request sent for order {trade.order.id}")
             else:
-                logger.warning(
-                    f"Cancel order returned None for {self.current_trade.order.id}"
-                )
-                self.cancel_event.set()
+                logger.warning(f"Cancel order returned None for {trade.order.id}")
+                self._advance_state(STATE_CANCELLED)
 
-        except Exception as e:
-            logger.error(f"Error cancelling order: {e}")
-            traceback.print_exc()
-            self.cancel_event.set()
+        except Exception:
+            logger.exception("Error cancelling order")
+            self._advance_state(STATE_CANCELLED)
 
     def login(self):
         """Login to Shioaji API."""
@@ -242,11 +497,18 @@ class LatencyMeasurement:
                 self.account = self.api.stock_account
 
             logger.info(f"Using account: {self.account}")
+
+            self._tune_broker_sockets()
+
+            # Resolve the traded contract once, outside the order loop
+            self.get_contract(self.config["order"]["symbol"])
+
+            self._register_order_callback()
+
             return True
 
-        except Exception as e:
-            logger.error(f"Login failed: {e}")
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Login failed")
             return False
 
     def logout(self):
@@ -256,16 +518,34 @@ class LatencyMeasurement:
             logger.info("Logged out successfully")
         except Exception as e:
             logger.error(f"Logout error: {e}")
+        finally:
+            self._drain_reports()
+            self.session.close()
+
+    def warm_up_report_session(self):
+        """Open the report connection ahead of the first order (DNS + TCP + TLS)."""
+        if not self._api_url:
+            return
+
+        try:
+            self.session.head(self._api_url, timeout=5)
+            logger.info("Latency report connection warmed up")
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to warm up report connection: {e}")
 
     def get_contract(self, symbol):
-        """Get contract object for the given symbol."""
+        """Get contract object for the given symbol (cached after first lookup)."""
+        contract = self._contract_cache.get(symbol)
+        if contract is not None:
+            return contract
+
         try:
             contract = self.api.Contracts.Stocks.TSE.get(symbol)
-            if contract:
-                return contract
+            if not contract:
+                contract = self.api.Contracts.Stocks.OTC.get(symbol)
 
-            contract = self.api.Contracts.Stocks.OTC.get(symbol)
             if contract:
+                self._contract_cache[symbol] = contract
                 return contract
 
             logger.error(f"Contract not found for symbol: {symbol}")
@@ -275,36 +555,28 @@ class LatencyMeasurement:
             logger.error(f"Error getting contract: {e}")
             return None
 
-    def _parse_action(self, action):
-        """Parse action string to constant."""
-        action_lower = action.lower()
-        if action_lower not in self._action_map:
-            raise ValueError(f"Invalid action: {action}")
-        return self._action_map[action_lower]
-
-    def _parse_order_params(self):
-        """Parse order parameters from config."""
-        price_type_str = self.config["order"]["price_type"]
-        if price_type_str not in self._price_type_map:
-            raise ValueError(f"Invalid price type: {price_type_str}")
-
-        order_type_str = self.config["order"]["order_type"]
-        if order_type_str not in self._order_type_map:
-            raise ValueError(f"Invalid order type: {order_type_str}")
-
-        order_lot_str = self.config["order"]["order_lot"]
-        if order_lot_str not in self._order_lot_map:
-            raise ValueError(f"Invalid order lot: {order_lot_str}")
-
-        order_cond_str = self.config["order"]["order_cond"]
-        if order_cond_str not in self._order_cond_map:
-            raise ValueError(f"Invalid order cond: {order_cond_str}")
-
-        return (
-            self._price_type_map[price_type_str],
-            self._order_type_map[order_type_str],
-            self._order_lot_map[order_lot_str],
-            self._order_cond_map[order_cond_str],
+    @staticmethod
+    def _resolve_constant(mapping, value, label):
+        """Map a config string to its Shioaji constant."""
+        if value not in mapping:
+            raise ValueError(f"Invalid {label}: {value}")
+        return mapping[value]
+
+    def build_order(self, price, quantity):
+        """Build a fresh Order from the resolved config constants.
+
+        Called once per submission: the SDK fills id/seqno/ordno in on a
+        placed Order, so a reused one would carry the previous order's ids.
+        """
+        return self.api.Order(
+            price=price,
+            quantity=quantity,
+            action=self._resolved_action,
+            price_type=self._resolved_price_type,
+            order_type=self._resolved_order_type,
+            order_lot=self._resolved_order_lot,
+            order_cond=self._resolved_order_cond,
+            account=self.account,
         )
 
     def submit_order(self, symbol, action, price, quantity):
@@ -315,31 +587,21 @@ class LatencyMeasurement:
                 logger.error(f"Cannot submit order: contract not found for {symbol}")
                 return False
 
-            action_const = self._parse_action(action)
-            price_type, order_type, order_lot, order_cond = self._parse_order_params()
-
-            order = self.api.Order(
-                price=price,
-                quantity=quantity,
-                action=action_const,
-                price_type=price_type,
-                order_type=order_type,
-                order_lot=order_lot,
-                order_cond=order_cond,
-                account=self.account,
-            )
-
-            self.order_start_time = time.perf_counter()
-            logger.info(f"Submitting order: {symbol} {action} {price} x{quantity}")
+            # Built before the start stamp so construction is not measured
+            order = self.build_order(price, quantity)
 
-            self.order_event.clear()
-            self.cancel_event.clear()
+            with self._cv:
+                self._state = STATE_IDLE
+                # A previous order that timed out or was cancelled manually
+                # still has its id here; a late ack for it must not count
+                self._expected_order_id = None
 
             self.current_symbol = symbol
-            self.current_action_str = action.lower()
             self.current_price = price
             self.current_quantity = quantity
 
+            # Nothing but the SDK call between the start stamp and place_order
+            self.order_start_ns = time.perf_counter_ns()
             trade = self.api.place_order(contract, order)
 
             if not trade:
@@ -347,89 +609,131 @@ class LatencyMeasurement:
                 return False
 
             self.current_trade = trade
+            with self._cv:
+                self._expected_order_id = trade.order.id
+            logger.info(
+                "Order sent: %s %s %s x%s (id=%s)",
+                symbol,
+                action,
+                price,
+                quantity,
+                trade.order.id,
+            )
 
             # Wait for callback, but if timeout, check status manually
-            if not self.order_event.wait(timeout=ORDER_TIMEOUT):
-                logger.warning("No callback received, checking status manually...")
+            acknowledged = self._wait_for_state(STATE_SUBMITTED, ORDER_TIMEOUT)
 
-                # Update status and check if order is PreSubmitted/Submitted
-                self.api.update_status(self.account)
-                trades = self.api.list_trades()
+            if not acknowledged:
+                logger.warning("No callback received, checking status manually...")
 
-                current_order = None
-                for t in trades:
-                    if t.order.id == trade.order.id:
-                        current_order = t
-                        break
+                # Refresh only this trade instead of polling every open order
+                self.api.update_status(self.account, trade=trade)
 
-                if not current_order:
-                    logger.error("Order not found in trades list")
-                    return False
-
-                logger.info(f"Manual status check: {current_order.status.status}")
+                logger.info(f"Manual status check: {trade.status.status}")
 
                 # If order is PreSubmitted or Submitted, trigger callback manually
-                if str(current_order.status.status) in [
-                    "Status.PreSubmitted",
-                    "Status.Submitted",
-                ]:
+                if trade.status.status in ORDER_SUBMITTED_STATUSES:
                     logger.info("Order confirmed via manual status check")
-                    self.current_trade = current_order
 
                     # Calculate latency (approximate, since callback was delayed)
-                    end_time = time.perf_counter()
-                    self.measured_latency_ms = (end_time - self.order_start_time) * 1000
+                    latency_ns = time.perf_counter_ns() - self.order_start_ns
+                    self.measured_latency_ns = latency_ns
                     logger.info(
-                        f"  Round-trip latency (approx): {self.measured_latency_ms:.2f} ms"
+                        "  Round-trip latency (approx): %.2f ms", latency_ns / 1_000_000
                     )
 
                     # Send report and cancel
-                    side = "B" if self.current_action_str == "buy" else "S"
-                    self.send_latency_report(
+                    self.enqueue_latency_report(
                         symbol=self.current_symbol,
-                        side=side,
+                        side=self._side_char,
                         price=self.current_price,
                         volume=self.current_quantity,
-                        latency_ms=self.measured_latency_ms,
+                        latency_ns=latency_ns,
                     )
 
-                    self._cancel_order()
+                    self._cancel_order(trade)
                 else:
                     logger.error(
-                        f"Order in unexpected status: {current_order.status.status}"
+                        f"Order in unexpected status: {trade.status.status}"
                     )
                     return False
+            elif self._state == STATE_FAILED:
+                return False
 
             logger.info(f"Waiting for cancel confirmation...")
 
-            if not self.cancel_event.wait(timeout=CANCEL_TIMEOUT):
+            cancelled = self._wait_for_state(STATE_CANCELLED, CANCEL_TIMEOUT)
+
+            if not cancelled:
                 logger.error("Order cancellation timeout")
                 return False
 
             return True
 
-        except Exception as e:
-            logger.error(f"Error submitting order: {e}")
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error submitting order")
             return False
 
-    def send_latency_report(self, symbol, side, price, volume, latency_ms):
-        """Send latency report to API."""
+    def enqueue_latency_report(self, **report):
+        """Queue a latency report for the background sender (never blocks)."""
         try:
-            api_url = self.config["api"]["url"]
-            broker_name = self.config["api"]["broker_name"]
+            self._report_queue.put_nowait(report)
+        except queue.Full:
+            logger.warning("Latency report queue full, dropping report")
 
-            data = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "broker": broker_name,
-                "latency_ms": latency_ms,
-                "symbol": symbol,
-                "side": side,
-                "price": price,
-                "volume": volume,
-            }
+    def _report_worker(self):
+        """Send queued latency reports in FIFO order until a None sentinel."""
+        while True:
+            report = self._report_queue.get()
+            if report is None:
+                return
+            self.send_latency_report(**report)
 
-            response = requests.post(api_url, json=data, timeout=5)
+    def _drain_reports(self):
+        """Stop the report worker after it has sent everything queued.
+
+        Bounded by REPORT_DRAIN_TIMEOUT overall, even when the queue is full
+        behind a slow report endpoint.
+        """
+        deadline = time.monotonic() + REPORT_DRAIN_TIMEOUT
+        try:
+            self._report_queue.put(None, timeout=REPORT_DRAIN_TIMEOUT)
+        except queue.Full:
+            # Give up the oldest report to make room for the sentinel
+            try:
+                self._report_queue.get_nowait()
+                logger.warning("Latency report queue full, dropping oldest report")
+            except queue.Empty:
+                pass
+            try:
+                self._report_queue.put_nowait(None)
+            except queue.Full:
+                logger.warning("Could not queue report worker shutdown")
+        self._report_thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        if self._report_thread.is_alive():
+            logger.warning("Timed out flushing pending latency reports")
+
+    def send_latency_report(self, symbol, side, price, volume, latency_ns):
+        """Send latency report to API.
+
+        Args:
+            latency_ns: Integer nanoseconds; converted to ms only for the payload
+        """
+        try:
+            latency_ms = latency_ns / 1_000_000
+
+            data = self._report_payload
+            data["timestamp"] = datetime.now(timezone.utc)
+            data["latency_ms"] = latency_ms
+            data["symbol"] = symbol
+            data["side"] = side
+            data["price"] = price
+            data["volume"] = volume
+
+            # orjson emits the aware datetime in the same ISO 8601 form
+            response = self.session.post(
+                self._api_url, data=orjson.dumps(data), timeout=5
+            )
 
             if response.status_code == 200:
                 logger.info(f"Latency report sent: {latency_ms:.2f}ms for {symbol}")
@@ -445,15 +749,17 @@ class LatencyMeasurement:
         except Exception as e:
             logger.error(f"Unexpected error sending latency report: {e}")
 
-    def get_current_time_hhmm(self):
-        """Get current time in HHMM format (Taiwan timezone UTC+8)."""
-        taiwan_time = datetime.now(TAIWAN_TZ)
-        return taiwan_time.hour * 100 + taiwan_time.minute
-
-    def is_weekday(self):
-        """Check if today is a weekday (Monday-Friday)."""
-        taiwan_time = datetime.now(TAIWAN_TZ)
-        return taiwan_time.weekday() < 5
+    @staticmethod
+    def seconds_until_trading_start(now, start_hour, start_minute):
+        """Seconds from `now` (UTC+8) until the next weekday trading-window start."""
+        target = now.replace(
+            hour=start_hour, minute=start_minute, second=0, microsecond=0
+        )
+        if target <= now:
+            target += timedelta(days=1)
+        while target.weekday() >= 5:
+            target += timedelta(days=1)
+        return (target - now).total_seconds()
 
     def run_latency_test(self):
         """Run the latency test loop."""
@@ -467,6 +773,7 @@ class LatencyMeasurement:
         end_time_str = self.config["trading_hours"]["end_time"]
         start_time = int(start_time_str.replace(":", ""))
         end_time = int(end_time_str.replace(":", ""))
+        start_hour, start_minute = divmod(start_time, 100)
 
         logger.info(f"Starting latency test")
         logger.info(f"  Symbol: {symbol}")
@@ -478,10 +785,19 @@ class LatencyMeasurement:
 
         order_count = 0
 
+        # Weekday only changes at midnight, so recompute it once per date
+        cached_date = None
+        is_weekday = False
+
         while True:
             try:
-                current_time = self.get_current_time_hhmm()
-                is_weekday = self.is_weekday()
+                # One clock read per iteration serves every check below
+                now = datetime.now(TAIWAN_TZ)
+                current_time = now.hour * 100 + now.minute
+                today = now.date()
+                if today != cached_date:
+                    cached_date = today
+                    is_weekday = today.weekday() < 5
                 is_trading_time = start_time <= current_time <= end_time
 
                 if not is_weekday or not is_trading_time:
@@ -489,7 +805,10 @@ class LatencyMeasurement:
                         logger.info(
                             f"Waiting for trading hours... (current: {current_time:04d}, weekday: {is_weekday})"
                         )
-                    time.sleep(60)
+                    wait_s = self.seconds_until_trading_start(
+                        now, start_hour, start_minute
+                    )
+                    time.sleep(min(MAX_IDLE_SLEEP, max(1, wait_s)))
                     continue
 
                 order_count += 1
@@ -510,14 +829,44 @@ class LatencyMeasurement:
             except KeyboardInterrupt:
                 logger.info("\nStopping latency test...")
                 break
-            except Exception as e:
-                logger.error(f"Error in test loop: {e}")
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error in test loop")
                 time.sleep(interval)
 
 
+def start_log_listener():
+    """Route root logging through a queue drained by a listener thread.
+
+    Records are queued by the calling thread and written by the listener's
+    thread, so console I/O never runs on the order callback thread.
+    """
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue, *root.handlers, respect_handler_level=True
+    )
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
+def stop_log_listener(listener):
+    """Flush queued records and hand the handlers back to the root logger."""
+    listener.stop()
+    logging.getLogger().handlers = list(listener.handlers)
+
+
 def main():
     """Main entry point."""
+    log_listener = start_log_listener()
+    try:
+        return run()
+    finally:
+        stop_log_listener(log_listener)
+
+
+def run():
+    """Log in, run the latency test until interrupted, then log out."""
     latency_test = LatencyMeasurement()
 
     try:
@@ -525,6 +874,8 @@ def main():
             logger.error("Failed to login")
             return 1
 
+        latency_test.warm_up_report_session()
+
         # Wait for connection to stabilize
         time.sleep(2)
 
@@ -532,9 +883,8 @@ def main():
 
     except KeyboardInterrupt:
         logger.info("\nShutting down...")
-    except Exception as e:
-        logger.error(f"Fatal error: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Fatal error")
         return 1
     finally:
         latency_test.logout()
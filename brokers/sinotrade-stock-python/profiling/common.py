@@ -3,12 +3,18 @@ Common utilities for place_order scripts.
 """
 
 import os
+import socket
+import sys
 import tomllib
 from pathlib import Path
+from stat import S_ISSOCK
 
 import shioaji as sj
 from dotenv import load_dotenv
 
+# Set once .env has been loaded; later init_api calls skip the file scan
+_INITIALIZED = False
+
 
 def load_config(config_path: str | Path) -> dict:
     """Load configuration from TOML file."""
@@ -22,12 +28,15 @@ def load_config(config_path: str | Path) -> dict:
 
 def init_api(base_dir: str | Path) -> sj.Shioaji:
     """Initialize Shioaji API, login, and activate CA."""
+    global _INITIALIZED
 
     base_dir = Path(base_dir)
-    env_path = base_dir / ".env"
-    if not env_path.exists():
-        raise SystemExit(f".env file not found: {env_path}")
-    load_dotenv(env_path)
+    if not _INITIALIZED:
+        env_path = base_dir / ".env"
+        if not env_path.exists():
+            raise SystemExit(f".env file not found: {env_path}")
+        load_dotenv(env_path, override=False)
+        _INITIALIZED = True
 
     api = sj.Shioaji()
 
@@ -57,15 +66,59 @@ def init_api(base_dir: str | Path) -> sj.Shioaji:
 def create_order(api: sj.Shioaji, config: dict) -> tuple:
     """Create contract and order from config."""
 
-    contract = api.Contracts.Stocks[config["order"]["symbol"]]
+    order_config = config["order"]
+    contract = api.Contracts.Stocks[order_config["symbol"]]
     order = api.Order(
-        price=config["order"]["price"],
-        quantity=config["order"]["quantity"],
-        action=getattr(sj.constant.Action, config["order"]["action"]),
-        price_type=getattr(sj.constant.StockPriceType, config["order"]["price_type"]),
-        order_type=getattr(sj.constant.OrderType, config["order"]["order_type"]),
-        order_lot=getattr(sj.constant.StockOrderLot, config["order"]["order_lot"]),
-        order_cond=getattr(sj.constant.StockOrderCond, config["order"]["order_cond"]),
+        price=order_config["price"],
+        quantity=order_config["quantity"],
+        action=getattr(sj.constant.Action, order_config["action"]),
+        price_type=getattr(sj.constant.StockPriceType, order_config["price_type"]),
+        order_type=getattr(sj.constant.OrderType, order_config["order_type"]),
+        order_lot=getattr(sj.constant.StockOrderLot, order_config["order_lot"]),
+        order_cond=getattr(sj.constant.StockOrderCond, order_config["order_cond"]),
         account=api.stock_account,
     )
     return contract, order
+
+
+def tune_sockets() -> int:
+    """Set TCP_NODELAY and SO_KEEPALIVE on the SDK's open TCP sockets.
+
+    The Shioaji transport is native code with no Python session to re-pool,
+    so its sockets are reached through this process's file descriptors.
+    """
+
+    tuned = 0
+    for fd in map(int, os.listdir("/proc/self/fd")):
+        try:
+            if not S_ISSOCK(os.fstat(fd).st_mode):
+                continue
+            sock = socket.socket(fileno=fd)
+        except OSError:
+            continue
+
+        try:
+            if sock.family not in (socket.AF_INET, socket.AF_INET6):
+                continue
+            if sock.type != socket.SOCK_STREAM:
+                continue
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            tuned += 1
+        except OSError:
+            pass
+        finally:
+            # The SDK owns the descriptor; never close it from here
+            sock.detach()
+
+    return tuned
+
+
+def warm_up(api: sj.Shioaji) -> None:
+    """Tune SDK sockets, then warm the connection with one read-only request."""
+
+    tune_sockets()
+    try:
+        api.update_status(api.stock_account)
+    except Exception as e:
+        print(f"Warm-up request failed: {e}", file=sys.stderr)
@@ -4,6 +4,8 @@ Place order with timing markers.
 Usage:
     python place_order.py
     python place_order.py --no-timing
+    python place_order.py --iterations 5
+    python place_order.py --warmup
     python place_order.py --config /path/to/config.toml
 """
 
@@ -12,24 +14,19 @@ import sys
 import time
 from pathlib import Path
 
-from common import init_api, load_config, create_order
+from common import init_api, load_config, create_order, warm_up
+from timing import emit_timing
 
 BASE_DIR = Path(__file__).parent.parent
 DEFAULT_CONFIG = BASE_DIR / "config.toml"
 
 
-def main(enable_timing: bool = True, config_path: str | Path = None):
-    """Execute place_order."""
-    if config_path is None:
-        config_path = DEFAULT_CONFIG
-    config = load_config(config_path)
-    api = init_api(BASE_DIR)
-    contract, order = create_order(api, config)
-
+def place_and_cancel(api, contract, order, enable_timing: bool = True):
+    """Place one order, emit its timing markers, then cancel it."""
     # Place order to open
     if enable_timing:
+        time.perf_counter_ns()  # warm up the clock path before the real read
         start_ns = time.perf_counter_ns()
-        print(f"===START={start_ns}===", file=sys.stderr, flush=True)
 
     try:
         trade = api.place_order(contract, order)
@@ -39,8 +36,8 @@ def main(enable_timing: bool = True, config_path: str | Path = None):
 
     if enable_timing:
         end_ns = time.perf_counter_ns()
-        print(f"===END={end_ns}===", file=sys.stderr, flush=True)
-        print(f"TOTAL_NS={end_ns - start_ns}", file=sys.stderr, flush=True)
+        # Markers are written after the call so no I/O lands in the window
+        emit_timing(start_ns, end_ns)
 
     # Cancel order to close
     try:
@@ -51,6 +48,32 @@ def main(enable_timing: bool = True, config_path: str | Path = None):
     return trade
 
 
+def main(
+    enable_timing: bool = True,
+    config_path: str | Path = None,
+    iterations: int = 1,
+    warmup: bool = False,
+):
+    """Execute place_order, once per iteration, in a single login session."""
+    if config_path is None:
+        config_path = DEFAULT_CONFIG
+    config = load_config(config_path)
+    api = init_api(BASE_DIR)
+
+    if warmup:
+        warm_up(api)
+
+    trade = None
+    for _ in range(iterations):
+        # Fresh Order each time: the SDK fills its ids in once it is placed
+        contract, order = create_order(api, config)
+        trade = place_and_cancel(api, contract, order, enable_timing)
+        if trade is None:
+            break
+
+    return trade
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Place order with timing markers")
     parser.add_argument(
@@ -62,5 +85,21 @@ if __name__ == "__main__":
         default=None,
         help="Path to order config (default: ../config.toml)",
     )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=1,
+        help="Orders to place in this process, one marker set each (default: 1)",
+    )
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Tune SDK sockets and send one read-only request before timing",
+    )
     args = parser.parse_args()
-    main(enable_timing=not args.no_timing, config_path=args.config)
+    main(
+        enable_timing=not args.no_timing,
+        config_path=args.config,
+        iterations=args.iterations,
+        warmup=args.warmup,
+    )
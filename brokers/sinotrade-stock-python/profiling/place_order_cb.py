@@ -4,36 +4,75 @@ Place order and handle callback with timing markers.
 Usage:
     python place_order_cb.py
     python place_order_cb.py --no-timing
+    python place_order_cb.py --no-callback
+    python place_order_cb.py --iterations 5
+    python place_order_cb.py --warmup
     python place_order_cb.py --config /path/to/config.toml
 """
 
 import argparse
 import sys
+import threading
 import time
 from pathlib import Path
 
 from shioaji.constant import OrderState
 
-from common import init_api, load_config, create_order
-from shioaji_types import StockOrderEvent, StockDealEvent
+from common import init_api, load_config, create_order, warm_up
+from shioaji_types import (
+    StockDealEvent,
+    StockDealEventData,
+    StockOrderEvent,
+    StockOrderEventData,
+)
+from timing import emit_timing
 
 BASE_DIR = Path(__file__).parent.parent
 DEFAULT_CONFIG = BASE_DIR / "config.toml"
+CALLBACK_TIMEOUT = 3
+
+# Set by the callback so main() stops waiting as soon as the ack arrives
+order_acked = threading.Event()
+cancel_acked = threading.Event()
+
+# perf_counter_ns when the New ack reached the callback (valid once order_acked)
+order_ack_ns = 0
 
 
 def stock_order_handler(event: StockOrderEvent):
     """Handle Stock Order Event"""
-    op = event["operation"]
-    order = event["order"]
-    if op["op_code"] == "00":
-        print(f"Stock order {op['op_type']} success: {order['id']}")
+    global order_ack_ns
+    received_ns = time.perf_counter_ns()
+
+    # Converted after the timestamp so it doesn't count towards the ack time
+    try:
+        data = StockOrderEventData.from_dict(event)
+    except (KeyError, TypeError):
+        # Never raise on the SDK callback thread
+        print(f"Malformed order callback: {event}", file=sys.stderr)
+        return
+    op = data.operation
+    if op.op_code == "00":
+        print(f"Stock order {op.op_type} success: {data.order.get('id')}")
     else:
-        print(f"Stock order failed: {op['op_msg']}")
+        print(f"Stock order failed: {op.op_msg}")
+
+    if op.op_type == "New":
+        order_ack_ns = received_ns
+        order_acked.set()
+    elif op.op_type == "Cancel":
+        cancel_acked.set()
 
 
 def stock_deal_handler(deal: StockDealEvent):
     """Handle Stock Deal Event"""
-    print(f"Stock deal: {deal['code']} @ {deal['price']} x {deal['quantity']}")
+    try:
+        data = StockDealEventData.from_dict(deal)
+    except (KeyError, TypeError):
+        # Never raise on the SDK callback thread
+        print(f"Malformed deal callback: {deal}", file=sys.stderr)
+        return
+    print(f"Stock deal: {data.code} @ {data.price} x {data.quantity}")
 
 
 def order_cb(stat: OrderState, msg: dict):
@@ -50,21 +89,17 @@ def order_cb(stat: OrderState, msg: dict):
         print("Unknown Order State")
 
 
-def main(enable_timing: bool = True, config_path: str | Path = None):
-    """Execute place_order with callback"""
-    if config_path is None:
-        config_path = DEFAULT_CONFIG
-    config = load_config(config_path)
-    api = init_api(BASE_DIR)
-    contract, order = create_order(api, config)
-
-    # Register order callback
-    api.set_order_callback(order_cb)
+def place_and_cancel(
+    api, contract, order, enable_timing: bool = True, wait_callback: bool = True
+):
+    """Place one order, emit its timing markers, then cancel it."""
+    order_acked.clear()
+    cancel_acked.clear()
 
     # Place order to open
     if enable_timing:
+        time.perf_counter_ns()  # warm up the clock path before the real read
         start_ns = time.perf_counter_ns()
-        print(f"===START={start_ns}===", file=sys.stderr, flush=True)
 
     try:
         trade = api.place_order(contract, order)
@@ -74,11 +109,17 @@ def main(enable_timing: bool = True, config_path: str | Path = None):
 
     if enable_timing:
         end_ns = time.perf_counter_ns()
-        print(f"===END={end_ns}===", file=sys.stderr, flush=True)
-        print(f"TOTAL_NS={end_ns - start_ns}", file=sys.stderr, flush=True)
 
-    print("Waiting for order callback...", flush=True)
-    time.sleep(3)
+    ack_ns = 0
+    if wait_callback:
+        print("Waiting for order callback...", flush=True)
+        if order_acked.wait(timeout=CALLBACK_TIMEOUT):
+            ack_ns = order_ack_ns
+
+    if enable_timing:
+        # Written after the ack wait so no I/O lands in the window, and the
+        # order init -> exchange accepted time travels with START/END
+        emit_timing(start_ns, end_ns, ack_ns)
 
     # Cancel order to close
     try:
@@ -86,8 +127,40 @@ def main(enable_timing: bool = True, config_path: str | Path = None):
     except Exception as e:
         print(f"Cancel order failed: {e}", file=sys.stderr)
 
-    print("Waiting for cancel callback...", flush=True)
-    time.sleep(3)
+    if wait_callback:
+        print("Waiting for cancel callback...", flush=True)
+        cancel_acked.wait(timeout=CALLBACK_TIMEOUT)
+
+    return trade
+
+
+def main(
+    enable_timing: bool = True,
+    config_path: str | Path = None,
+    wait_callback: bool = True,
+    iterations: int = 1,
+    warmup: bool = False,
+):
+    """Execute place_order with callback, once per iteration, in one session"""
+    if config_path is None:
+        config_path = DEFAULT_CONFIG
+    config = load_config(config_path)
+    api = init_api(BASE_DIR)
+
+    # Register order callback
+    if wait_callback:
+        api.set_order_callback(order_cb)
+
+    if warmup:
+        warm_up(api)
+
+    trade = None
+    for _ in range(iterations):
+        # Fresh Order each time: the SDK fills its ids in once it is placed
+        contract, order = create_order(api, config)
+        trade = place_and_cancel(api, contract, order, enable_timing, wait_callback)
+        if trade is None:
+            break
 
     return trade
 
@@ -105,5 +178,27 @@ if __name__ == "__main__":
         default=None,
         help="Path to order config (default: ../config.toml)",
     )
+    parser.add_argument(
+        "--no-callback",
+        action="store_true",
+        help="Skip callback registration and waits (pure send benchmark)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=1,
+        help="Orders to place in this process, one marker set each (default: 1)",
+    )
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Tune SDK sockets and send one read-only request before timing",
+    )
     args = parser.parse_args()
-    main(enable_timing=not args.no_timing, config_path=args.config)
+    main(
+        enable_timing=not args.no_timing,
+        config_path=args.config,
+        wait_callback=not args.no_callback,
+        iterations=args.iterations,
+        warmup=args.warmup,
+    )
@@ -4,15 +4,20 @@ Profiling CLI for place_order latency analysis.
 Usage:
     sudo -E ../.venv/bin/python3 profile_place_order.py --tool perf
     ../.venv/bin/python3 profile_place_order.py --tool strace
+    sudo -E ../.venv/bin/python3 profile_place_order.py --tool perf-trace
+    sudo -E ../.venv/bin/python3 profile_place_order.py --tool perf --inner-iterations 5
 """
 
 import argparse
 import statistics
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
-from profilers import BaseProfiler, StraceProfiler, PerfProfiler
-from runner import ProfilingRunner
+from profilers import BaseProfiler, StraceProfiler, PerfProfiler, PerfTraceProfiler
+from profilers.perf import PERF_MODES
+from runner import ProfilingResult, ProfilingRunner
 from report import ReportGenerator
 
 
@@ -21,22 +26,34 @@ DEFAULT_TEST_SCRIPT = SCRIPT_DIR / "place_order.py"
 FLAMEGRAPH_DIR = SCRIPT_DIR / "FlameGraph"
 
 
-PROFILERS = ("strace", "perf")
+PROFILERS = ("strace", "perf", "perf-trace")
 
 
 def create_profiler(
     tool: str,
     output_dir: Path,
     python_perf_support: bool = False,
+    follow_forks: bool = False,
+    trace_write: bool = False,
+    call_graph: str = "lbr",
+    perf_mode: str = "full",
 ) -> BaseProfiler:
     """Create a single profiler instance."""
     if tool == "perf":
         return PerfProfiler(
             output_dir=output_dir,
+            mode=perf_mode,
+            call_graph=call_graph,
             python_perf_support=python_perf_support,
         )
     elif tool == "strace":
-        return StraceProfiler(output_dir=output_dir)
+        return StraceProfiler(
+            output_dir=output_dir,
+            follow_forks=follow_forks,
+            trace_write=trace_write,
+        )
+    elif tool == "perf-trace":
+        return PerfTraceProfiler(output_dir=output_dir)
     else:
         raise ValueError(f"Unknown tool: {tool}")
 
@@ -47,21 +64,34 @@ def run_single(
     tool: str,
     python_perf_support: bool = False,
     verbose: bool = False,
+    follow_forks: bool = False,
+    trace_write: bool = False,
+    call_graph: str = "lbr",
+    perf_mode: str = "full",
+    use_inferno: bool = True,
 ) -> dict:
     """Run a single profiling iteration with one tool."""
 
     # Create profiler
-    profiler = create_profiler(tool, output_dir, python_perf_support)
+    profiler = create_profiler(
+        tool,
+        output_dir,
+        python_perf_support,
+        follow_forks,
+        trace_write,
+        call_graph,
+        perf_mode,
+    )
 
     # Create runner and run
     runner = ProfilingRunner(output_dir=output_dir, profiler=profiler, verbose=verbose)
     result = runner.run(test_script)
 
-    # Generate flamegraph if perf is used and FlameGraph tools exist
-    if tool == "perf" and FLAMEGRAPH_DIR.exists():
+    # Generate flamegraph if perf is used and inferno or FlameGraph tools exist
+    if tool == "perf":
         if verbose:
             print("  Generating flamegraph...")
-        svg_path = profiler.generate_flamegraph(FLAMEGRAPH_DIR)
+        svg_path = profiler.generate_flamegraph(FLAMEGRAPH_DIR, use_inferno)
         if svg_path and verbose:
             print(f"  Flamegraph saved to: {svg_path}")
 
@@ -79,6 +109,97 @@ def run_single(
     return reporter.generate_json_report()
 
 
+def run_inner(
+    output_dir: Path,
+    test_script: Path,
+    inner_iterations: int,
+    python_perf_support: bool = False,
+    verbose: bool = False,
+    call_graph: str = "lbr",
+    perf_mode: str = "full",
+    use_inferno: bool = True,
+) -> list:
+    """
+    Record several orders in one perf session and report on each separately.
+
+    The script is launched (and logs in) once; each order's samples are
+    selected from the shared perf.data by its START/END markers.
+    """
+
+    # Monotonic sample clock, so perf --time windows line up with perf_counter_ns
+    profiler = PerfProfiler(
+        output_dir=output_dir,
+        mode=perf_mode,
+        call_graph=call_graph,
+        python_perf_support=python_perf_support,
+        clockid="monotonic",
+    )
+    runner = ProfilingRunner(
+        output_dir=output_dir,
+        profiler=profiler,
+        verbose=verbose,
+        script_args=["--iterations", str(inner_iterations)],
+    )
+    timings = runner.run_iterations(test_script)
+
+    reports = []
+    for order_num, timing in enumerate(timings, start=1):
+        window = profiler.window(
+            output_dir / f"order_{order_num}", timing.start_ns, timing.end_ns
+        )
+
+        if verbose:
+            print(f"  Parsing perf output for order {order_num}...")
+        result = ProfilingResult(
+            timing=timing,
+            profiler_result=window.parse_output(),
+            stderr_log=runner.stderr_log,
+            output_dir=window.output_dir,
+        )
+
+        window.generate_flamegraph(FLAMEGRAPH_DIR, use_inferno)
+
+        reporter = ReportGenerator(result)
+        reporter.save_reports()
+        reports.append(reporter.generate_json_report())
+
+    return reports
+
+
+def run_iteration(
+    iter_num: int, args: argparse.Namespace, test_script: Path
+) -> list:
+    """Run one profiled process (top-level so it can run in a worker process)."""
+
+    output_dir = Path(args.output_dir) / f"iter_{iter_num}"
+    if args.inner_iterations > 1:
+        return run_inner(
+            output_dir=output_dir,
+            test_script=test_script,
+            inner_iterations=args.inner_iterations,
+            python_perf_support=args.python_perf_support,
+            verbose=args.verbose,
+            call_graph=args.call_graph,
+            perf_mode=args.perf_mode,
+            use_inferno=not args.no_inferno,
+        )
+
+    return [
+        run_single(
+            output_dir=output_dir,
+            test_script=test_script,
+            tool=args.tool,
+            python_perf_support=args.python_perf_support,
+            verbose=args.verbose,
+            follow_forks=args.follow_forks,
+            trace_write=args.trace_write,
+            call_graph=args.call_graph,
+            perf_mode=args.perf_mode,
+            use_inferno=not args.no_inferno,
+        )
+    ]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Profile place_order with modular profiling tools",
@@ -86,10 +207,12 @@ def main():
         epilog="""
 Examples:
   sudo -E ../.venv/bin/python3 profile_place_order.py --tool perf --iterations 5
+  sudo -E ../.venv/bin/python3 profile_place_order.py --tool perf --inner-iterations 5
 
 Available tools:
-  strace    - Syscall tracing (network wait analysis)
-  perf      - CPU sampling (library/function breakdown)
+  strace     - Syscall tracing (network wait analysis)
+  perf       - CPU sampling (library/function breakdown)
+  perf-trace - Syscall tracing via perf trace (lower overhead than strace)
         """,
     )
 
@@ -106,6 +229,19 @@ Available tools:
         default=5,
         help="Number of profiling iterations (default: 5)",
     )
+    parser.add_argument(
+        "--inner-iterations",
+        type=int,
+        default=1,
+        help="Orders placed per profiled process, split by markers (perf only)",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Profiled processes to run at once (default: 1; concurrent runs "
+        "perturb each other's timings and share broker rate limits)",
+    )
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -123,6 +259,36 @@ Available tools:
         action="store_true",
         help="Enable PYTHONPERFSUPPORT for Python 3.12+ symbol resolution",
     )
+    parser.add_argument(
+        "--call-graph",
+        type=str,
+        default="lbr",
+        choices=("lbr", "fp", "dwarf"),
+        help="perf call graph unwinder (default: lbr, falls back to fp without LBR)",
+    )
+    parser.add_argument(
+        "--perf-mode",
+        type=str,
+        default="full",
+        choices=PERF_MODES,
+        help="perf detail: full (call graphs), fast (-F 99, no stacks), "
+        "dso_only (fast, library breakdown only)",
+    )
+    parser.add_argument(
+        "--no-inferno",
+        action="store_true",
+        help="Build flamegraphs with the FlameGraph perl scripts even if inferno is installed",
+    )
+    parser.add_argument(
+        "--follow-forks",
+        action="store_true",
+        help="strace: trace all threads (-f), e.g. when callbacks run off the main thread",
+    )
+    parser.add_argument(
+        "--trace-write",
+        action="store_true",
+        help="strace: also trace write (includes the script's own output)",
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -132,6 +298,9 @@ Available tools:
 
     args = parser.parse_args()
 
+    if args.inner_iterations > 1 and args.tool != "perf":
+        parser.error("--inner-iterations requires --tool perf")
+
     # Parse test script
     test_script = Path(args.test_script) if args.test_script else DEFAULT_TEST_SCRIPT
     if not test_script.exists():
@@ -140,25 +309,34 @@ Available tools:
 
     # Run iterations
     results = []
-    for i in range(args.iterations):
-        iter_num = i + 1
-        print(f"[{iter_num}/{args.iterations}] {args.tool}...", end=" ", flush=True)
+    if args.parallel > 1:
+        # Workers print their own verbose output; progress lines are in order
+        with ProcessPoolExecutor(max_workers=args.parallel) as executor:
+            iter_nums = range(1, args.iterations + 1)
+            futures = executor.map(
+                run_iteration, iter_nums, repeat(args), repeat(test_script)
+            )
+            for iter_num, iter_results in zip(iter_nums, futures):
+                results.extend(iter_results)
+                totals = ", ".join(
+                    f"{r['timing']['total_ms']:.1f}" for r in iter_results
+                )
+                print(
+                    f"[{iter_num}/{args.iterations}] {args.tool}... done ({totals} ms)"
+                )
+    else:
+        for i in range(args.iterations):
+            iter_num = i + 1
+            print(f"[{iter_num}/{args.iterations}] {args.tool}...", end=" ", flush=True)
 
-        if args.verbose:
-            print()  # newline for verbose output
+            if args.verbose:
+                print()  # newline for verbose output
 
-        output_dir = Path(args.output_dir) / f"iter_{iter_num}"
-        result = run_single(
-            output_dir=output_dir,
-            test_script=test_script,
-            tool=args.tool,
-            python_perf_support=args.python_perf_support,
-            verbose=args.verbose,
-        )
-        results.append(result)
+            iter_results = run_iteration(iter_num, args, test_script)
+            results.extend(iter_results)
 
-        total_ms = result["timing"]["total_ms"]
-        print(f"done ({total_ms:.1f} ms)")
+            totals = ", ".join(f"{r['timing']['total_ms']:.1f}" for r in iter_results)
+            print(f"done ({totals} ms)")
 
     # Summary statistics
     total_times = [r["timing"]["total_ms"] for r in results]
@@ -172,6 +350,8 @@ Available tools:
         f"Tool: {args.tool}",
         f"Iterations: {args.iterations}",
     ]
+    if args.inner_iterations > 1:
+        summary_lines.append(f"Orders: {len(results)}")
 
     if len(total_times) > 1:
         summary_lines.extend(
@@ -3,10 +3,12 @@
 from .base import BaseProfiler, ProfilerResult
 from .strace import StraceProfiler
 from .perf import PerfProfiler
+from .perf_trace import PerfTraceProfiler
 
 __all__ = [
     "BaseProfiler",
     "ProfilerResult",
     "StraceProfiler",
     "PerfProfiler",
+    "PerfTraceProfiler",
 ]
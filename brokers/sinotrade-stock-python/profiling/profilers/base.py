@@ -4,7 +4,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Any
-import subprocess
+import shutil
 
 
 @dataclass
@@ -64,5 +64,4 @@ class BaseProfiler(ABC):
     def _check_tool_exists(self, tool_name: str) -> bool:
         """Check if a tool exists in PATH."""
 
-        result = subprocess.run(["which", tool_name], capture_output=True)
-        return result.returncode == 0
+        return shutil.which(tool_name) is not None
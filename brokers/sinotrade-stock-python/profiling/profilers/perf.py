@@ -1,13 +1,41 @@
 """Perf profiler for CPU sampling."""
 
-import re
+import csv
+import shutil
 import subprocess
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional, Tuple
 
 from .base import BaseProfiler, ProfilerResult
 
 
+# Column separator for the breakdown report. perf pads columns with spaces by
+# default; with a separator each row is "12.34%<TAB>567<TAB><dso>[<TAB>[.] <symbol>]"
+# and can go through the C csv reader. Tabs do not occur in DSO or symbol names.
+REPORT_FIELD_SEP = "\t"
+
+# Present on CPUs whose PMU exposes Last Branch Records (Intel, bare metal or
+# VMs with PMU passthrough). AMD PMUs with BRS/LbrExtV2 expose it as well but
+# cannot record --call-graph lbr, so the CPU vendor is checked too.
+LBR_CAPS = Path("/sys/bus/event_source/devices/cpu/caps/branches")
+CPUINFO = Path("/proc/cpuinfo")
+
+# Reports can be several MB; read them in large chunks, one line at a time
+REPORT_READ_BUFFER = 1 << 16
+
+# Characters of the call graph report kept in the metrics
+CALLGRAPH_SNIPPET_CHARS = 2000
+
+# Sample rate for the stackless modes; DSO/symbol shares need few samples
+FAST_SAMPLE_FREQ = 99
+
+PerfMode = Literal["full", "fast", "dso_only"]
+PERF_MODES = ("full", "fast", "dso_only")
+
+
 class PerfProfiler(BaseProfiler):
     """Profiler using Linux perf for CPU sampling."""
 
@@ -17,19 +45,70 @@ class PerfProfiler(BaseProfiler):
         self,
         output_dir: Path,
         sample_freq: int = 1000,
-        call_graph: str = "dwarf",
+        call_graph: str = "lbr",
         python_perf_support: bool = False,
+        clockid: Optional[str] = None,
+        perf_data: Optional[Path] = None,
+        time_range: Optional[Tuple[int, int]] = None,
+        mode: PerfMode = "full",
     ):
+        """
+        Args:
+            mode: "full" records call graphs at sample_freq; "fast" records
+                without stacks at FAST_SAMPLE_FREQ (DSO + symbol breakdown);
+                "dso_only" is "fast" with only the DSO breakdown
+            call_graph: Unwinder for perf record: "lbr" (falls back to "fp"
+                when the PMU has no LBR), "fp" or "dwarf" (slowest; copies
+                stack per sample)
+            clockid: Sample clock for perf record (e.g. "monotonic", which
+                matches time.perf_counter_ns() so markers can select windows)
+            perf_data: Existing perf.data to report on instead of recording one
+            time_range: (start_ns, end_ns) window passed to perf as --time
+        """
         super().__init__(output_dir)
-        self.sample_freq = sample_freq
-        self.call_graph = call_graph
+        self.mode = mode
+        if mode == "full":
+            self.sample_freq = sample_freq
+            self.call_graph = self._resolve_call_graph(call_graph)
+        else:
+            self.sample_freq = FAST_SAMPLE_FREQ
+            self.call_graph = None
         self.python_perf_support = python_perf_support
+        self.clockid = clockid
+        self.time_range = time_range
 
-        self.perf_data = self.output_dir / "perf.data"
-        self.dso_report = self.output_dir / "perf_dso.txt"
-        self.symbols_report = self.output_dir / "perf_symbols.txt"
+        self.perf_data = perf_data or self.output_dir / "perf.data"
+        # One perf report sorted by dso,symbol (dso only in dso_only mode)
+        self.breakdown_report = self.output_dir / "perf_breakdown.txt"
         self.callgraph_report = self.output_dir / "perf_callgraph.txt"
 
+    @staticmethod
+    def _resolve_call_graph(call_graph: str) -> str:
+        """Fall back from LBR to frame pointers when the CPU cannot record branches."""
+
+        if call_graph == "lbr" and not PerfProfiler._lbr_supported():
+            print(
+                "WARNING: LBR call graph unavailable on this CPU, using fp",
+                file=sys.stderr,
+            )
+            return "fp"
+        return call_graph
+
+    @staticmethod
+    def _lbr_supported() -> bool:
+        """LBR call graphs need branch caps on an Intel PMU."""
+
+        if not LBR_CAPS.exists():
+            return False
+        try:
+            with open(CPUINFO) as f:
+                for line in f:
+                    if line.startswith("vendor_id"):
+                        return line.partition(":")[2].strip() == "GenuineIntel"
+        except OSError:
+            pass
+        return False
+
     def check_available(self) -> bool:
         return self._check_tool_exists("perf")
 
@@ -42,16 +121,45 @@ class PerfProfiler(BaseProfiler):
             "record",
             "-F",
             str(self.sample_freq),
-            "-g",
-            "--call-graph",
-            self.call_graph,
-            "-o",
-            str(self.perf_data),
-            "--",
         ]
+        if self.call_graph:
+            cmd.extend(["-g", "--call-graph", self.call_graph])
+        cmd.extend(["-o", str(self.perf_data)])
+        if self.clockid:
+            cmd.extend(["-k", self.clockid])
+        cmd.append("--")
         cmd.extend(inner_cmd)
         return cmd
 
+    def window(self, output_dir: Path, start_ns: int, end_ns: int) -> "PerfProfiler":
+        """
+        Return a profiler that reports on one time window of this recording.
+
+        Requires the recording to use a clockid matching the marker clock.
+        """
+
+        return PerfProfiler(
+            output_dir=output_dir,
+            sample_freq=self.sample_freq,
+            call_graph=self.call_graph,
+            python_perf_support=self.python_perf_support,
+            perf_data=self.perf_data,
+            time_range=(start_ns, end_ns),
+            mode=self.mode,
+        )
+
+    def _time_filter(self) -> List[str]:
+        """perf --time arguments for the configured window, if any."""
+
+        if self.time_range is None:
+            return []
+        start_ns, end_ns = self.time_range
+        return [
+            "--time",
+            f"{start_ns // 1_000_000_000}.{start_ns % 1_000_000_000:09d},"
+            f"{end_ns // 1_000_000_000}.{end_ns % 1_000_000_000:09d}",
+        ]
+
     def get_env_vars(self) -> Dict[str, str]:
         """Return environment variables needed for this profiler."""
 
@@ -69,196 +177,199 @@ class PerfProfiler(BaseProfiler):
 
         self._generate_reports()
 
-        libs = self._parse_dso_report()
-        functions = self._parse_symbol_report()
-        callgraph = self._read_callgraph()
+        output_files = {
+            "perf_data": self.perf_data,
+            "breakdown_report": self.breakdown_report,
+        }
+        libs, functions = self._parse_breakdown_report()
+        callgraph = ""
+
+        if self.mode == "full":
+            output_files["callgraph_report"] = self.callgraph_report
+            callgraph = self._read_callgraph()
 
         return ProfilerResult(
             profiler_name=self.name,
-            output_files={
-                "perf_data": self.perf_data,
-                "dso_report": self.dso_report,
-                "symbols_report": self.symbols_report,
-                "callgraph_report": self.callgraph_report,
-            },
+            output_files=output_files,
             metrics={
                 "library_breakdown": libs,
                 "top_functions": functions[:15],
-                "callgraph_snippet": callgraph[:2000],
+                "callgraph_snippet": callgraph,
             },
         )
 
-    def _generate_reports(self):
-        """Generate text reports from perf.data."""
-
-        # DSO (library) breakdown
-        with open(self.dso_report, "w") as f:
-            subprocess.run(
-                [
-                    "perf",
-                    "report",
-                    "-i",
-                    str(self.perf_data),
-                    "--stdio",
-                    "--sort",
-                    "dso",
-                    "-n",
-                ],
-                stdout=f,
-                stderr=subprocess.DEVNULL,
-            )
-
-        # Symbol (function) breakdown
-        with open(self.symbols_report, "w") as f:
-            subprocess.run(
-                [
-                    "perf",
-                    "report",
-                    "-i",
-                    str(self.perf_data),
-                    "--stdio",
-                    "--sort",
-                    "symbol",
-                    "-n",
-                ],
-                stdout=f,
-                stderr=subprocess.DEVNULL,
-            )
+    def _report_command(self, *args: str) -> List[str]:
+        """perf report --stdio on this recording (and window) with extra args."""
 
-        # Call graph
-        with open(self.callgraph_report, "w") as f:
-            subprocess.run(
-                [
-                    "perf",
-                    "report",
-                    "-i",
-                    str(self.perf_data),
-                    "--stdio",
-                    "-g",
-                    "graph",
-                    "--max-stack",
-                    "10",
-                ],
-                stdout=f,
-                stderr=subprocess.DEVNULL,
-            )
+        return [
+            "perf",
+            "report",
+            "-i",
+            str(self.perf_data),
+            "--stdio",
+            *args,
+            *self._time_filter(),
+        ]
 
-    def _parse_dso_report(self) -> List[Dict[str, Any]]:
-        """Parse DSO (library) report."""
+    @staticmethod
+    def _run_report(cmd: List[str], output: Path):
+        with open(output, "w") as f:
+            subprocess.run(cmd, stdout=f, stderr=subprocess.DEVNULL)
 
-        libs = []
-        pattern = re.compile(r"\s*([\d.]+)%\s+(\d+)\s+(.+)")
+    def _generate_reports(self):
+        """Generate text reports from perf.data.
 
-        if not self.dso_report.exists():
-            return libs
+        DSO and symbol breakdowns come from a single perf report pass (each
+        pass re-reads and re-symbolizes perf.data); the independent call
+        graph report runs alongside it.
+        """
 
-        for line in self.dso_report.read_text().split("\n"):
-            if line.strip().startswith("#"):
-                continue
+        sort_keys = "dso" if self.mode == "dso_only" else "dso,symbol"
+        jobs = [
+            (
+                self._report_command(
+                    "--sort", sort_keys, "-n", "--field-separator", REPORT_FIELD_SEP
+                ),
+                self.breakdown_report,
+            )
+        ]
 
-            match = pattern.match(line)
-            if match:
-                libs.append(
-                    {
-                        "overhead_pct": float(match.group(1)),
-                        "samples": int(match.group(2)),
-                        "library": match.group(3).strip(),
-                    }
+        # Call graph (needs stacks)
+        if self.mode == "full":
+            jobs.append(
+                (
+                    self._report_command("-g", "graph", "--max-stack", "10"),
+                    self.callgraph_report,
                 )
+            )
 
-        return sorted(libs, key=lambda x: x["overhead_pct"], reverse=True)
-
-    def _parse_symbol_report(self) -> List[Dict[str, Any]]:
-        """Parse symbol (function) report."""
-
-        functions = []
-        pattern = re.compile(r"\s*([\d.]+)%\s+(\d+)\s+\[.\]\s+(.+)")
-
-        if not self.symbols_report.exists():
-            return functions
-
-        for line in self.symbols_report.read_text().split("\n"):
-            if line.strip().startswith("#"):
-                continue
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            list(executor.map(lambda job: self._run_report(*job), jobs))
 
-            match = pattern.match(line)
-            if match:
-                functions.append(
-                    {
-                        "overhead_pct": float(match.group(1)),
-                        "samples": int(match.group(2)),
-                        "function": match.group(3).strip(),
-                    }
-                )
+    def _parse_breakdown_report(
+        self,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Parse the breakdown report into (libraries, functions), by overhead."""
+
+        if not self.breakdown_report.exists():
+            return [], []
+
+        # [overhead_pct, samples] per DSO / per symbol
+        libs = defaultdict(lambda: [0.0, 0])
+        functions = defaultdict(lambda: [0.0, 0])
+        with_symbols = self.mode != "dso_only"
+        num_fields = 4 if with_symbols else 3
+
+        with open(self.breakdown_report, buffering=REPORT_READ_BUFFER) as f:
+            rows = csv.reader(f, delimiter=REPORT_FIELD_SEP, quoting=csv.QUOTE_NONE)
+            for row in rows:
+                if len(row) < num_fields or row[0].lstrip().startswith("#"):
+                    continue
+
+                try:
+                    overhead = float(row[0].strip().rstrip("%"))
+                    samples = int(row[1])
+                except ValueError:
+                    continue
+
+                lib = libs[row[2].strip()]
+                lib[0] += overhead
+                lib[1] += samples
+
+                if with_symbols:
+                    # "[.] name" (user) / "[k] name" (kernel)
+                    symbol = row[3].strip()
+                    func = functions[symbol.partition("] ")[2] or symbol]
+                    func[0] += overhead
+                    func[1] += samples
+
+        return (
+            self._by_overhead(libs, "library"),
+            self._by_overhead(functions, "function"),
+        )
 
-        return sorted(functions, key=lambda x: x["overhead_pct"], reverse=True)
+    @staticmethod
+    def _by_overhead(totals: dict, key: str) -> List[Dict[str, Any]]:
+        rows = [
+            {"overhead_pct": round(overhead, 2), "samples": samples, key: name}
+            for name, (overhead, samples) in totals.items()
+        ]
+        return sorted(rows, key=lambda x: x["overhead_pct"], reverse=True)
 
     def _read_callgraph(self) -> str:
-        """Read call graph report."""
+        """Read the head of the call graph report (only the snippet is kept)."""
 
         if not self.callgraph_report.exists():
             return ""
-        return self.callgraph_report.read_text()
+        with open(self.callgraph_report) as f:
+            return f.read(CALLGRAPH_SNIPPET_CHARS)
 
-    def generate_flamegraph(self, flamegraph_dir: Path) -> Optional[Path]:
+    def generate_flamegraph(
+        self, flamegraph_dir: Path, use_inferno: bool = True
+    ) -> Optional[Path]:
         """
         Generate flamegraph SVG from perf.data.
 
+        Uses inferno (Rust port of the FlameGraph scripts) when it is on PATH,
+        otherwise the perl scripts from flamegraph_dir.
+
         Args:
             flamegraph_dir: Path to FlameGraph tools directory
+            use_inferno: Prefer inferno-collapse-perf / inferno-flamegraph
 
         Returns:
-            Path to generated SVG, or None if failed
+            Path to generated SVG, or None if failed or recorded without stacks
         """
 
-        stackcollapse = flamegraph_dir / "stackcollapse-perf.pl"
-        flamegraph_pl = flamegraph_dir / "flamegraph.pl"
-
-        if not stackcollapse.exists() or not flamegraph_pl.exists():
+        if self.mode != "full":
             return None
 
-        perf_script_out = self.output_dir / "perf_script.txt"
-        collapsed_stacks = self.output_dir / "perf_collapsed.txt"
-        flamegraph_svg = self.output_dir / "flamegraph.svg"
+        render_args = ["--title", "place_order Performance", "--width", "1400"]
 
-        try:
-            # Step 1: perf script
-            with open(perf_script_out, "w") as f:
-                subprocess.run(
-                    ["perf", "script", "-i", str(self.perf_data)],
-                    stdout=f,
-                    stderr=subprocess.DEVNULL,
-                    check=True,
-                )
+        if use_inferno and shutil.which("inferno-collapse-perf") and shutil.which(
+            "inferno-flamegraph"
+        ):
+            collapse_cmd = ["inferno-collapse-perf"]
+            render_cmd = ["inferno-flamegraph", *render_args]
+        else:
+            stackcollapse = flamegraph_dir / "stackcollapse-perf.pl"
+            flamegraph_pl = flamegraph_dir / "flamegraph.pl"
 
-            # Step 2: stackcollapse
-            with open(perf_script_out, "r") as inf, open(collapsed_stacks, "w") as outf:
-                subprocess.run(
-                    ["perl", str(stackcollapse)],
-                    stdin=inf,
-                    stdout=outf,
-                    stderr=subprocess.DEVNULL,
-                    check=True,
-                )
+            if not stackcollapse.exists() or not flamegraph_pl.exists():
+                return None
 
-            # Step 3: flamegraph
-            with open(collapsed_stacks, "r") as inf, open(flamegraph_svg, "w") as outf:
-                subprocess.run(
-                    [
-                        "perl",
-                        str(flamegraph_pl),
-                        "--title",
-                        "place_order Performance",
-                        "--width",
-                        "1400",
-                    ],
-                    stdin=inf,
-                    stdout=outf,
-                    stderr=subprocess.DEVNULL,
-                    check=True,
-                )
+            collapse_cmd = ["perl", str(stackcollapse)]
+            render_cmd = ["perl", str(flamegraph_pl), *render_args]
 
-            return flamegraph_svg
+        flamegraph_svg = self.output_dir / "flamegraph.svg"
 
-        except subprocess.CalledProcessError:
+        # perf script | stackcollapse | flamegraph, streamed through pipes so
+        # no intermediate stack dumps are written to disk
+        with open(flamegraph_svg, "wb") as outf:
+            script = subprocess.Popen(
+                ["perf", "script", "-i", str(self.perf_data), *self._time_filter()],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            collapse = subprocess.Popen(
+                collapse_cmd,
+                stdin=script.stdout,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            # Only the downstream stage holds each read end, so SIGPIPE propagates
+            script.stdout.close()
+            render = subprocess.Popen(
+                render_cmd,
+                stdin=collapse.stdout,
+                stdout=outf,
+                stderr=subprocess.DEVNULL,
+            )
+            collapse.stdout.close()
+
+            returncodes = (render.wait(), collapse.wait(), script.wait())
+
+        if any(returncodes):
             return None
+
+        return flamegraph_svg
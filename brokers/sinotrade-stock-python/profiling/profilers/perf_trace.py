@@ -0,0 +1,97 @@
+"""Perf trace profiler for syscall tracing."""
+
+import mmap
+import re
+from pathlib import Path
+from typing import List, Optional
+
+from .strace import StraceProfiler, SyscallEvent
+
+
+#   123.456 ( 0.008 ms): comm/tid syscall(args...) = ret
+#   123.456 ( 9.876 ms): comm/tid  ... [continued]: syscall()) = ret
+_PERF_TRACE_LINE_RE = re.compile(
+    rb"^\s*([\d.]+)\s+\(\s*([\d.]+)\s+ms\):\s+\S+/(\d+)\s+"
+    rb"(?:\.\.\. \[continued\]: )?(\w+)\(.*\)\s+=\s+(.+?)\s*$",
+    re.MULTILINE,
+)
+
+
+class PerfTraceProfiler(StraceProfiler):
+    """Profiler using perf trace (tracepoints instead of ptrace) for syscall tracing.
+
+    Produces the same events and metrics as StraceProfiler at lower overhead
+    on the traced process. All threads are traced without -f.
+    """
+
+    name = "perf-trace"
+    log_key = "perf_trace_log"
+
+    # send/recv are libc wrappers on x86_64; perf trace rejects unknown syscalls
+    DEFAULT_TRACE_FILTER = (
+        "sendto,sendmsg,recvfrom,recvmsg,"
+        "epoll_wait,epoll_pwait,poll,select,pselect6"
+    )
+
+    def __init__(
+        self,
+        output_dir: Path,
+        trace_filter: Optional[str] = None,
+        keep_raw: bool = False,
+    ):
+        super().__init__(output_dir, trace_filter=trace_filter, keep_raw=keep_raw)
+        self.log_file = self.output_dir / "perf_trace.log"
+
+    def check_available(self) -> bool:
+        return self._check_tool_exists("perf")
+
+    def requires_root(self) -> bool:
+        return True
+
+    def build_command(self, inner_cmd: List[str]) -> List[str]:
+        cmd = [
+            "perf",
+            "trace",
+            "-T",  # Absolute timestamps instead of relative to the first event
+            "-e",
+            self.trace_filter,
+            "-o",
+            str(self.log_file),
+            "--",
+        ]
+        cmd.extend(inner_cmd)
+        return cmd
+
+    def _parse_log(self) -> List[SyscallEvent]:
+        """Parse perf trace log file into structured events."""
+
+        events = []
+        keep_raw = self.keep_raw
+
+        with open(self.log_file, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty log: nothing was traced
+                return events
+
+            with mm:
+                for match in _PERF_TRACE_LINE_RE.finditer(mm):
+                    timestamp_ms, duration_ms, tid, name, ret_val = match.groups()
+
+                    events.append(
+                        SyscallEvent(
+                            timestamp=float(timestamp_ms) / 1000,
+                            pid=int(tid),
+                            syscall_name=name.decode(),
+                            duration=float(duration_ms) / 1000,
+                            return_value=ret_val.decode(errors="replace"),
+                            raw_line=(
+                                match.group(0).decode(errors="replace").strip()
+                                if keep_raw
+                                else ""
+                            ),
+                        )
+                    )
+
+        return events
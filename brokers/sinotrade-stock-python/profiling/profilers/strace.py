@@ -1,6 +1,9 @@
 """Strace profiler for syscall tracing."""
 
+import mmap
 import re
+import shutil
+import subprocess
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Dict, Any, Optional
@@ -8,26 +11,56 @@ from typing import List, Dict, Any, Optional
 from .base import BaseProfiler, ProfilerResult
 
 
-@dataclass
+# strace -tt -T line forms, matched in one pass over the mapped log:
+#   [pid 123] HH:MM:SS.ffffff syscall(...) = ret <duration>
+#   123 HH:MM:SS.ffffff syscall(...) = ret <duration>
+#   HH:MM:SS.ffffff syscall(...) = ret <duration>   (without -f)
+# "<... syscall resumed>" lines carry the duration of a call that was
+# interrupted by another thread, so they are matched too. The greedy
+# ".*\)" anchors the return value on the last ") = " of the line.
+_SYSCALL_LINE_RE = re.compile(
+    rb"^(?:(?:\[pid\s+)?(\d+)\]?\s+)?(\d\d):(\d\d):(\d\d\.\d+)\s+"
+    rb"(?:<\.\.\. (\w+) resumed>|(\w+)\().*\)\s+=\s+(.+?)\s+<([\d.]+)>\s*$",
+    re.MULTILINE,
+)
+
+# ERE for the "<duration>" suffix every matchable line ends with; used to
+# prefilter the log with rg/grep before the Python regex sees it
+_DURATION_SUFFIX_PATTERN = r"<[0-9.]+>[[:space:]]*$"
+
+
+@dataclass(slots=True)
 class SyscallEvent:
-    """Parsed syscall event from strace output."""
+    """Parsed syscall event from strace output (slotted: one per traced call)."""
 
     timestamp: float  # Seconds since midnight
-    pid: int
+    pid: int  # 0 when traced without -f (no pid prefix)
     syscall_name: str
     duration: float  # In seconds
     return_value: str
-    raw_line: str
+    raw_line: str  # Empty unless the profiler was created with keep_raw=True
+
+
+@dataclass(slots=True)
+class WaitEvent:
+    """Network wait reported in the timeline (slotted, serializes as an object)."""
+
+    timestamp: float  # Seconds since midnight
+    syscall: str
+    duration_ms: float
 
 
 class StraceProfiler(BaseProfiler):
     """Profiler using strace for syscall tracing."""
 
     name = "strace"
+    log_key = "strace_log"
 
-    # Default syscalls to trace for network latency analysis
+    # Default syscalls to trace for network latency analysis (network + poll only;
+    # tracing write would also capture every print/log line)
     DEFAULT_TRACE_FILTER = (
-        "sendto,send,sendmsg,recvfrom,recv,recvmsg," "epoll_wait,epoll_pwait,poll,write"
+        "sendto,send,sendmsg,recvfrom,recv,recvmsg,"
+        "epoll_wait,epoll_pwait,poll,select,pselect6"
     )
 
     # Syscalls that represent blocking network wait
@@ -37,11 +70,17 @@ class StraceProfiler(BaseProfiler):
         self,
         output_dir: Path,
         trace_filter: Optional[str] = None,
-        follow_forks: bool = True,
+        follow_forks: bool = False,
+        trace_write: bool = False,
+        keep_raw: bool = False,
     ):
         super().__init__(output_dir)
         self.trace_filter = trace_filter or self.DEFAULT_TRACE_FILTER
+        if trace_write:
+            self.trace_filter += ",write"
         self.follow_forks = follow_forks
+        # Keep each event's source line (debugging only; the metrics never read it)
+        self.keep_raw = keep_raw
         self.log_file = self.output_dir / "strace.log"
 
     def check_available(self) -> bool:
@@ -55,6 +94,9 @@ class StraceProfiler(BaseProfiler):
             "strace",
             "-T",  # Show time spent in each syscall
             "-tt",  # Absolute timestamps with microseconds
+            "-qq",  # No attach/detach or exit status messages
+            "-s",
+            "0",  # Only timings are needed, not buffer contents
         ]
 
         if self.follow_forks:
@@ -77,7 +119,7 @@ class StraceProfiler(BaseProfiler):
             return ProfilerResult(
                 profiler_name=self.name,
                 output_files={},
-                metrics={"error": "strace log not found"},
+                metrics={"error": f"{self.name} log not found"},
             )
 
         events = self._parse_log()
@@ -85,7 +127,7 @@ class StraceProfiler(BaseProfiler):
 
         return ProfilerResult(
             profiler_name=self.name,
-            output_files={"strace_log": self.log_file},
+            output_files={self.log_key: self.log_file},
             metrics=metrics,
             raw_data=events,
         )
@@ -93,69 +135,112 @@ class StraceProfiler(BaseProfiler):
     def _parse_log(self) -> List[SyscallEvent]:
         """Parse strace log file into structured events."""
 
-        events = []
+        filtered = self._prefilter_log()
+        if filtered is not None:
+            return self._parse_buffer(filtered)
 
-        # Pattern 1: [pid 123] HH:MM:SS.ffffff syscall(...) = ret <duration>
-        pattern1 = re.compile(
-            r"\[pid\s+(\d+)\]\s+(\d{2}:\d{2}:\d{2}\.\d+)\s+(.+?)\s*=\s*(.+?)\s+<([\d.]+)>"
-        )
-        # Pattern 2: 123 HH:MM:SS.ffffff syscall(...) = ret <duration>
-        pattern2 = re.compile(
-            r"^(\d+)\s+(\d{2}:\d{2}:\d{2}\.\d+)\s+(.+?)\s*=\s*(.+?)\s+<([\d.]+)>"
-        )
+        with open(self.log_file, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty log: nothing was traced
+                return []
 
-        with open(self.log_file) as f:
-            for line in f:
-                match = pattern1.search(line) or pattern2.match(line)
-                if match:
-                    pid = int(match.group(1))
-                    timestamp_str = match.group(2)
-                    syscall = match.group(3)
-                    ret_val = match.group(4)
-                    duration = float(match.group(5))
-
-                    # Convert HH:MM:SS.ffffff to seconds since midnight
-                    h, m, s = timestamp_str.split(":")
-                    timestamp = int(h) * 3600 + int(m) * 60 + float(s)
-
-                    syscall_name = syscall.split("(")[0] if "(" in syscall else syscall
-
-                    events.append(
-                        SyscallEvent(
-                            timestamp=timestamp,
-                            pid=pid,
-                            syscall_name=syscall_name,
-                            duration=duration,
-                            return_value=ret_val,
-                            raw_line=line.strip(),
-                        )
-                    )
+            with mm:
+                return self._parse_buffer(mm)
 
-        return events
+    def _prefilter_log(self) -> Optional[bytes]:
+        """Keep only lines ending in a <duration> using rg or grep.
 
-    def _analyze_events(self, events: List[SyscallEvent]) -> Dict[str, Any]:
-        """Analyze parsed events to compute metrics."""
+        Every line _SYSCALL_LINE_RE can match ends in "<duration>", so
+        dropping the rest (signals, exits, unfinished calls) up front is
+        lossless and far cheaper in C than in the Python regex. Returns None
+        when neither tool is installed or the search fails, in which case
+        the caller scans the whole log.
+        """
+
+        if shutil.which("rg"):
+            cmd = ["rg", "--no-line-number", "--no-filename", "-e"]
+        elif shutil.which("grep"):
+            cmd = ["grep", "-E", "-e"]
+        else:
+            return None
+
+        cmd += [_DURATION_SUFFIX_PATTERN, str(self.log_file)]
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+        # Exit status 1 means no line matched; anything above is an error
+        if proc.returncode > 1:
+            return None
+        return proc.stdout
+
+    def _parse_buffer(self, data) -> List[SyscallEvent]:
+        """Parse strace lines from a bytes-like buffer (bytes or mmap)."""
 
-        # Categorize events
-        sends = [e for e in events if "send" in e.syscall_name]
-        recvs = [e for e in events if "recv" in e.syscall_name]
-        waits = [e for e in events if e.syscall_name in self.WAIT_SYSCALLS]
+        events = []
+        keep_raw = self.keep_raw
+
+        # Hot loop: locals instead of attribute/global lookups, positional
+        # construction, and caches for the few distinct values that repeat
+        # on every line (syscall names, HH:MM prefixes)
+        append = events.append
+        make_event = SyscallEvent
+        names = {}
+        minute_base = {}
+
+        for match in _SYSCALL_LINE_RE.finditer(data):
+            pid, h, m, s, resumed, name, ret_val, duration = match.groups()
+
+            name = resumed or name
+            syscall_name = names.get(name)
+            if syscall_name is None:
+                syscall_name = names[name] = name.decode()
+
+            base = minute_base.get((h, m))
+            if base is None:
+                base = minute_base[h, m] = int(h) * 3600 + int(m) * 60
+
+            append(
+                make_event(
+                    base + float(s),
+                    int(pid) if pid else 0,
+                    syscall_name,
+                    float(duration),
+                    ret_val.decode(errors="replace"),
+                    (
+                        match.group(0).decode(errors="replace").strip()
+                        if keep_raw
+                        else ""
+                    ),
+                )
+            )
 
-        # Calculate network wait time
-        network_wait_ms = sum(e.duration * 1000 for e in waits)
+        return events
+
+    def _analyze_events(self, events: List[SyscallEvent]) -> Dict[str, Any]:
+        """Analyze parsed events to compute metrics in a single pass."""
+
+        wait_syscalls = frozenset(self.WAIT_SYSCALLS)
+        send_count = 0
+        recv_count = 0
+        network_wait_s = 0.0
+        wait_events = []
+
+        for e in events:
+            name = e.syscall_name
+            if name in wait_syscalls:
+                network_wait_s += e.duration
+                wait_events.append(WaitEvent(e.timestamp, name, e.duration * 1000))
+            elif name.startswith("send"):
+                send_count += 1
+            elif name.startswith("recv"):
+                recv_count += 1
 
         return {
-            "network_wait_ms": network_wait_ms,
-            "send_count": len(sends),
-            "recv_count": len(recvs),
-            "wait_count": len(waits),
+            "network_wait_ms": network_wait_s * 1000,
+            "send_count": send_count,
+            "recv_count": recv_count,
+            "wait_count": len(wait_events),
             "total_events": len(events),
-            "wait_events": [
-                {
-                    "timestamp": e.timestamp,
-                    "syscall": e.syscall_name,
-                    "duration_ms": e.duration * 1000,
-                }
-                for e in waits
-            ],
+            "wait_events": wait_events,
         }
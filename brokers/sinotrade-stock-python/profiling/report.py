@@ -1,11 +1,35 @@
 """Report generator for profiling results."""
 
+import dataclasses
 import json
+import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 
 from runner import ProfilingResult
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib encoder
+    orjson = None
+
+# Profilers whose metrics include network_wait_ms and wait_events
+SYSCALL_PROFILERS = ("strace", "perf-trace")
+
+
+def _json_default(obj):
+    """Encode what json can't: Paths inline, dataclasses (stdlib json only)."""
+    if isinstance(obj, os.PathLike):
+        return os.fspath(obj)
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    return str(obj)
+
+
+def _shorten_library(lib_name: str) -> str:
+    """Keep the tail of long DSO paths so they fit the 50-column table."""
+    return lib_name if len(lib_name) <= 47 else "..." + lib_name[-44:]
+
 
 class ReportGenerator:
     """Generates human-readable and machine-readable reports from profiling results."""
@@ -15,8 +39,25 @@ class ReportGenerator:
         self.profiler_name = result.profiler_result.profiler_name
         self.metrics = result.profiler_result.metrics
 
+        # Timing split shared by the text and JSON reports
+        self.total_ms = result.timing.total_ms
+        # Order init -> exchange ack at the callback (None when not observed)
+        self.ack_ms = result.timing.ack_ms
+        self.network_ms = 0.0
+        if self.profiler_name in SYSCALL_PROFILERS:
+            # Network wait from syscall tracing
+            self.network_ms = self.metrics.get("network_wait_ms", 0.0)
+        self.local_ms = self.total_ms - self.network_ms
+        if self.total_ms > 0:
+            self.network_pct = self.network_ms / self.total_ms * 100
+            self.local_pct = self.local_ms / self.total_ms * 100
+        else:
+            self.network_pct = self.local_pct = 0
+
     def generate_text_report(self) -> str:
         """Generate a human-readable text report."""
+        result = self.result
+        profiler_name = self.profiler_name
         lines = []
 
         # Header
@@ -28,136 +69,133 @@ class ReportGenerator:
         # Timing Summary
         lines.append("TIMING SUMMARY")
         lines.append("-" * 80)
-        total_ms = self.result.timing.total_ms
-
-        # Get network wait from strace if available
-        network_ms = 0.0
-        if self.profiler_name == "strace":
-            network_ms = self.metrics.get("network_wait_ms", 0.0)
-
-        local_ms = total_ms - network_ms
-        network_pct = (network_ms / total_ms * 100) if total_ms > 0 else 0
-        local_pct = (local_ms / total_ms * 100) if total_ms > 0 else 0
+        total_ms = self.total_ms
+        network_ms, network_pct = self.network_ms, self.network_pct
+        local_ms, local_pct = self.local_ms, self.local_pct
 
         lines.append(f"Total Time:        {total_ms:>10.3f} ms  (100.0%)")
         lines.append(f"Network Wait:      {network_ms:>10.3f} ms  ({network_pct:>5.1f}%)")
         lines.append(f"Local Processing:  {local_ms:>10.3f} ms  ({local_pct:>5.1f}%)")
+        if self.ack_ms is not None:
+            lines.append(
+                f"Exchange Ack:      {self.ack_ms:>10.3f} ms  (order init -> callback)"
+            )
         lines.append("")
 
         # Profiler-specific section
-        if self.profiler_name == "strace":
-            lines.extend(self._format_strace_section())
-        elif self.profiler_name == "perf":
-            lines.extend(self._format_perf_section(local_ms))
+        section = ""
+        if profiler_name in SYSCALL_PROFILERS:
+            section = self._format_strace_section()
+        elif profiler_name == "perf":
+            section = self._format_perf_section(local_ms)
+        if section:
+            lines.append(section)
 
         # Output files
         lines.append("=" * 80)
         lines.append("OUTPUT FILES")
         lines.append("=" * 80)
-        lines.append(f"  {self.result.output_dir}/")
+        lines.append(f"  {result.output_dir}/")
 
-        for file_path in self.result.profiler_result.output_files.values():
-            lines.append(f"    {file_path.name}")
+        output_files = result.profiler_result.output_files.values()
+        lines.extend(f"    {file_path.name}" for file_path in output_files)
 
         lines.append("")
 
         return "\n".join(lines)
 
-    def _format_strace_section(self) -> list:
+    def _format_strace_section(self) -> str:
         """Format strace-specific report section."""
+        metrics = self.metrics
         lines = []
 
-        lines.append("SYSCALL ANALYSIS (strace)")
+        lines.append(f"SYSCALL ANALYSIS ({self.profiler_name})")
         lines.append("-" * 80)
         lines.append(
-            f"Syscalls:  {self.metrics.get('send_count', 0)} sends, "
-            f"{self.metrics.get('recv_count', 0)} recvs, "
-            f"{self.metrics.get('wait_count', 0)} waits"
+            f"Syscalls:  {metrics.get('send_count', 0)} sends, "
+            f"{metrics.get('recv_count', 0)} recvs, "
+            f"{metrics.get('wait_count', 0)} waits"
         )
         lines.append("")
 
         # Wait events timeline
-        wait_events = self.metrics.get("wait_events", [])
+        wait_events = metrics.get("wait_events", [])
         if wait_events:
             lines.append("NETWORK WAIT TIMELINE")
             lines.append("-" * 80)
             lines.append(f"{'Timestamp':<15} {'Syscall':<20} {'Duration (ms)':<15}")
             lines.append("-" * 80)
 
-            for event in wait_events[:20]:
-                lines.append(
-                    f"{event['timestamp']:.6f}  {event['syscall']:<20}  "
-                    f"{event['duration_ms']:>12.3f}"
+            lines.append(
+                "\n".join(
+                    f"{event.timestamp:.6f}  {event.syscall:<20}  "
+                    f"{event.duration_ms:>12.3f}"
+                    for event in wait_events[:20]
                 )
-
+            )
             lines.append("")
 
-        return lines
+        return "\n".join(lines)
 
-    def _format_perf_section(self, local_ms: float) -> list:
+    def _format_perf_section(self, local_ms: float) -> str:
         """Format perf-specific report section."""
+        metrics = self.metrics
         lines = []
 
-        if self.metrics.get("error"):
-            lines.append(f"PERF: {self.metrics['error']}")
-            lines.append("")
-            return lines
+        if metrics.get("error"):
+            return f"PERF: {metrics['error']}\n"
 
         # Library breakdown
-        libs = self.metrics.get("library_breakdown", [])
+        libs = metrics.get("library_breakdown", [])
         if libs:
             lines.append("LIBRARY BREAKDOWN (perf)")
             lines.append("-" * 80)
             lines.append(f"{'Library':<50} {'CPU %':<8} {'Est. Time (ms)':<12}")
             lines.append("-" * 80)
 
-            for lib in libs[:10]:
-                lib_name = lib["library"]
-                if len(lib_name) > 47:
-                    lib_name = "..." + lib_name[-44:]
-                est_time = (lib["overhead_pct"] / 100) * local_ms
-                lines.append(
-                    f"{lib_name:<50} {lib['overhead_pct']:>6.2f}%  {est_time:>10.3f}"
+            # Estimated time = overhead share of local processing time
+            scale = local_ms * 0.01
+            lines.append(
+                "\n".join(
+                    f"{_shorten_library(lib['library']):<50} "
+                    f"{lib['overhead_pct']:>6.2f}%  "
+                    f"{lib['overhead_pct'] * scale:>10.3f}"
+                    for lib in libs[:10]
                 )
-
+            )
             lines.append("")
 
         # Top functions
-        funcs = self.metrics.get("top_functions", [])
+        funcs = metrics.get("top_functions", [])
         if funcs:
             lines.append("TOP FUNCTIONS (perf)")
             lines.append("-" * 80)
-            for func in funcs[:10]:
-                lines.append(f"  {func['overhead_pct']:>6.2f}%  {func['function']}")
+            lines.append(
+                "\n".join(
+                    f"  {func['overhead_pct']:>6.2f}%  {func['function']}"
+                    for func in funcs[:10]
+                )
+            )
             lines.append("")
 
-        return lines
+        return "\n".join(lines)
 
     def generate_json_report(self) -> Dict[str, Any]:
         """Generate machine-readable JSON report."""
-        total_ms = self.result.timing.total_ms
-
-        # Get network wait from strace
-        network_ms = 0.0
-        if self.profiler_name == "strace":
-            network_ms = self.metrics.get("network_wait_ms", 0.0)
-
-        local_ms = total_ms - network_ms
-
         return {
             "timing": {
-                "total_ms": total_ms,
-                "network_ms": network_ms,
-                "local_ms": local_ms,
-                "network_pct": (network_ms / total_ms * 100) if total_ms > 0 else 0,
-                "local_pct": (local_ms / total_ms * 100) if total_ms > 0 else 0,
+                "total_ms": self.total_ms,
+                "network_ms": self.network_ms,
+                "local_ms": self.local_ms,
+                "network_pct": self.network_pct,
+                "local_pct": self.local_pct,
+                "ack_ms": self.ack_ms,
             },
             "profiler": {
                 "name": self.profiler_name,
                 "metrics": self.metrics,
-                "output_files": {
-                    k: str(v) for k, v in self.result.profiler_result.output_files.items()
-                },
+                # Paths are encoded by _json_default when the report is written
+                "output_files": self.result.profiler_result.output_files,
             },
         }
 
@@ -168,12 +206,22 @@ class ReportGenerator:
         # Text report
         text_report = self.generate_text_report()
         report_path = output_dir / "REPORT.txt"
-        report_path.write_text(text_report)
+        # Encode once and hand the whole report to a single write
+        report_path.write_bytes(text_report.encode("utf-8"))
 
         # JSON report
         json_report = self.generate_json_report()
         json_path = output_dir / "analysis.json"
-        with open(json_path, "w") as f:
-            json.dump(json_report, f, indent=2, default=str)
+        if orjson is not None:
+            json_path.write_bytes(
+                orjson.dumps(
+                    json_report,
+                    default=_json_default,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                )
+            )
+        else:
+            with open(json_path, "w") as f:
+                json.dump(json_report, f, indent=2, default=_json_default)
 
         return report_path, json_path
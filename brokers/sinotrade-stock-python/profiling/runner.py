@@ -1,14 +1,45 @@
 """Profiling runner that orchestrates a profiler."""
 
+import mmap
 import os
 import re
 import subprocess
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from profilers.base import BaseProfiler, ProfilerResult
+from timing import TIMING_FD_ENV, parse_timing_records
+
+# All text markers in one alternation, so output is scanned once; lastindex
+# tells which marker matched (1=START, 2=END, 3=TOTAL_NS, 4=ACK_NS)
+_MARKERS_RE = re.compile(
+    rb"===START=(\d+)===|===END=(\d+)===|TOTAL_NS=(\d+)|ACK_NS=(\d+)"
+)
+
+Markers = Tuple[List[int], List[int], List[int], List[int]]
+
+
+def _scan_markers(data) -> Markers:
+    """Collect START, END, TOTAL_NS and ACK_NS marker values in a single pass."""
+    found = ([], [], [], [])
+    for match in _MARKERS_RE.finditer(data):
+        group = match.lastindex
+        found[group - 1].append(int(match.group(group)))
+    return found
+
+
+def _scan_markers_in_file(path: Path) -> Markers:
+    """Scan a log for timing markers through a read-only mmap (no decode)."""
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return [], [], [], []
+        with mm:
+            return _scan_markers(mm)
 
 
 @dataclass
@@ -18,11 +49,19 @@ class TimingMarkers:
     start_ns: int
     end_ns: int
     total_ns: int
+    ack_ns: int = 0  # Order callback received the New ack; 0 if not observed
 
     @property
     def total_ms(self) -> float:
         return self.total_ns / 1_000_000
 
+    @property
+    def ack_ms(self) -> Optional[float]:
+        """Order init to exchange ack seen by the callback, if observed."""
+        if not self.ack_ns:
+            return None
+        return (self.ack_ns - self.start_ns) / 1_000_000
+
 
 @dataclass
 class ProfilingResult:
@@ -43,6 +82,7 @@ class ProfilingRunner:
         profiler: BaseProfiler,
         python_cmd: Optional[str] = None,
         verbose: bool = False,
+        script_args: Optional[List[str]] = None,
     ):
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -50,6 +90,13 @@ class ProfilingRunner:
         self.python_cmd = python_cmd or sys.executable
         self.stderr_log = self.output_dir / "stderr.log"
         self.verbose = verbose
+        self.script_args = script_args or []
+
+        # Profiler env overrides are fixed per profiler, so merge them once;
+        # each run only updates the TIMING_FD entry
+        self._env = dict(os.environ)
+        if hasattr(profiler, "get_env_vars"):
+            self._env.update(profiler.get_env_vars())
 
     def run(self, test_script: Path) -> ProfilingResult:
         """
@@ -61,23 +108,13 @@ class ProfilingRunner:
         Returns:
             ProfilingResult with profiler output
         """
-        self._check_environment()
-
-        cmd = self.profiler.build_command([self.python_cmd, str(test_script)])
+        records = self._execute(test_script)
 
-        env = os.environ.copy()
-        if hasattr(self.profiler, "get_env_vars"):
-            env.update(self.profiler.get_env_vars())
-
-        if self.verbose:
-            print(f"  Python: {self.python_cmd}")
-            print(f"  Command: {' '.join(cmd[:5])}...")
-
-        result = subprocess.run(cmd, capture_output=True, text=True, env=env)
-
-        self.stderr_log.write_text(result.stderr)
-
-        timing = self._extract_timing_markers(result.stderr)
+        if records:
+            start_ns, end_ns, ack_ns = records[0]
+            timing = TimingMarkers(start_ns, end_ns, end_ns - start_ns, ack_ns)
+        else:
+            timing = self._extract_timing_markers()
 
         if self.verbose:
             print(f"  Parsing {self.profiler.name} output...")
@@ -90,6 +127,78 @@ class ProfilingRunner:
             output_dir=self.output_dir,
         )
 
+    def run_iterations(self, test_script: Path) -> List[TimingMarkers]:
+        """
+        Run the profiler once over a script that places several orders.
+
+        Profiler output is left unparsed; callers report on each returned
+        window separately.
+
+        Returns:
+            TimingMarkers for every order, in the order they were placed
+        """
+        records = self._execute(test_script)
+
+        if records:
+            return [
+                TimingMarkers(start_ns, end_ns, end_ns - start_ns, ack_ns)
+                for start_ns, end_ns, ack_ns in records
+            ]
+
+        starts, ends, totals, acks = _scan_markers_in_file(self.stderr_log)
+
+        if not (starts and len(starts) == len(ends) == len(totals)):
+            raise ValueError("Could not find matching timing markers in output")
+        if len(acks) != len(starts):
+            # Older scripts print no ACK_NS lines
+            acks = [0] * len(starts)
+
+        return [
+            TimingMarkers(start_ns=start, end_ns=end, total_ns=total, ack_ns=ack)
+            for start, end, total, ack in zip(starts, ends, totals, acks)
+        ]
+
+    def _execute(self, test_script: Path) -> List[Tuple[int, int, int]]:
+        """
+        Run the test script under the profiler.
+
+        Timing records are read from a pipe inherited as TIMING_FD, keeping
+        marker writes off stderr; scripts that only print text markers
+        return an empty record list. stderr is streamed straight into
+        stderr.log rather than buffered in memory.
+
+        Returns:
+            [(start_ns, end_ns, ack_ns), ...]
+        """
+        self._check_environment()
+
+        cmd = self.profiler.build_command(
+            [self.python_cmd, str(test_script), *self.script_args]
+        )
+
+        if self.verbose:
+            print(f"  Python: {self.python_cmd}")
+            print(f"  Command: {' '.join(cmd[:5])}...")
+
+        timing_r, timing_w = os.pipe()
+        env = self._env
+        env[TIMING_FD_ENV] = str(timing_w)
+        try:
+            with open(self.stderr_log, "wb") as stderr_file:
+                subprocess.run(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=stderr_file,
+                    env=env,
+                    pass_fds=(timing_w,),
+                )
+        finally:
+            os.close(timing_w)
+
+        # Child has exited and the write end is closed, so this reads to EOF
+        with open(timing_r, "rb") as timing_pipe:
+            return parse_timing_records(timing_pipe.read())
+
     def _check_environment(self):
         """Check all prerequisites."""
         if not self.profiler.check_available():
@@ -103,29 +212,29 @@ class ProfilingRunner:
             )
             sys.exit(1)
 
-    def _extract_timing_markers(self, stderr: str) -> TimingMarkers:
-        """Extract timing markers from stderr output."""
-        start_match = re.search(r"===START=(\d+)===", stderr)
-        end_match = re.search(r"===END=(\d+)===", stderr)
-        total_match = re.search(r"TOTAL_NS=(\d+)", stderr)
+    def _extract_timing_markers(self) -> TimingMarkers:
+        """Extract timing markers from the stderr log."""
+        starts, ends, totals, acks = _scan_markers_in_file(self.stderr_log)
 
-        if not (start_match and end_match and total_match):
+        if not (starts and ends and totals):
             # Try reading from strace log if markers are there
             if self.profiler.name == "strace":
                 strace_log = self.profiler.log_file
                 if strace_log.exists():
-                    content = strace_log.read_text()
-                    start_match = start_match or re.search(
-                        r"===START=(\d+)===", content
+                    log_starts, log_ends, log_totals, log_acks = (
+                        _scan_markers_in_file(strace_log)
                     )
-                    end_match = end_match or re.search(r"===END=(\d+)===", content)
-                    total_match = total_match or re.search(r"TOTAL_NS=(\d+)", content)
+                    starts = starts or log_starts
+                    ends = ends or log_ends
+                    totals = totals or log_totals
+                    acks = acks or log_acks
 
-        if not (start_match and end_match and total_match):
+        if not (starts and ends and totals):
             raise ValueError("Could not find timing markers in output")
 
         return TimingMarkers(
-            start_ns=int(start_match.group(1)),
-            end_ns=int(end_match.group(1)),
-            total_ns=int(total_match.group(1)),
+            start_ns=starts[0],
+            end_ns=ends[0],
+            total_ns=totals[0],
+            ack_ns=acks[0] if acks else 0,
         )
@@ -3,8 +3,12 @@ Shioaji TypedDict definitions for order callbacks.
 
 Based on official documentation:
 https://github.com/Sinotrade/Shioaji/blob/master/skills/shioaji/ORDERS.md
+
+The TypedDicts describe the callback payloads; the slotted *Data classes
+at the end are what the stock callback handlers read at runtime.
 """
 
+from dataclasses import dataclass
 from typing import TypedDict, Literal
 
 
@@ -159,3 +163,83 @@ class FuturesDealEvent(TypedDict):
     market_type: Literal["Day", "Night"]
     combo: bool
     ts: float
+
+
+# Slotted runtime counterparts for the stock callback path. Built once per
+# callback with positional args; fields are then plain slot loads.
+
+
+@dataclass(slots=True)
+class OperationData:
+    """Slotted OperationDict."""
+
+    op_type: Literal["New", "Cancel", "UpdatePrice", "UpdateQty"]
+    op_code: str
+    op_msg: str
+
+    @classmethod
+    def from_dict(cls, d: OperationDict) -> "OperationData":
+        return cls(d["op_type"], d["op_code"], d["op_msg"])
+
+
+@dataclass(slots=True)
+class StockOrderEventData:
+    """Slotted StockOrderEvent (nested order/status/contract stay dicts)."""
+
+    operation: OperationData
+    order: StockOrderDict
+    status: OrderStatusDict
+    contract: StockContractDict
+
+    @classmethod
+    def from_dict(cls, d: StockOrderEvent) -> "StockOrderEventData":
+        return cls(
+            OperationData.from_dict(d["operation"]),
+            d["order"],
+            d["status"],
+            d["contract"],
+        )
+
+
+@dataclass(slots=True)
+class StockDealEventData:
+    """Slotted StockDealEvent."""
+
+    trade_id: str
+    seqno: str
+    ordno: str
+    exchange_seq: str
+    broker_id: str
+    account_id: str
+    action: Literal["Buy", "Sell"]
+    code: str
+    order_cond: Literal["Cash", "MarginTrading", "ShortSelling"]
+    order_lot: Literal["Common", "Odd", "IntradayOdd", "Fixing"]
+    price: float
+    quantity: int
+    web_id: str
+    custom_field: str
+    ts: float
+
+    @classmethod
+    def from_dict(cls, d: StockDealEvent) -> "StockDealEventData":
+        # Only code/price/quantity are required; the rest may be absent from
+        # a deal message and default to empty rather than raising
+        get = d.get
+        return cls(
+            get("trade_id", ""),
+            get("seqno", ""),
+            get("ordno", ""),
+            get("exchange_seq", ""),
+            get("broker_id", ""),
+            get("account_id", ""),
+            get("action", ""),
+            d["code"],
+            get("order_cond", ""),
+            get("order_lot", ""),
+            d["price"],
+            d["quantity"],
+            get("web_id", ""),
+            get("custom_field", ""),
+            get("ts", 0.0),
+        )
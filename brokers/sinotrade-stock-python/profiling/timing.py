@@ -0,0 +1,41 @@
+"""
+Timing marker protocol shared by the test scripts and the profiling runner.
+
+When the runner passes a pipe fd in TIMING_FD, each order's window is written
+there as one fixed-size binary record, so no marker I/O goes through stderr
+(which strace/perf may be tracing). Without it, text markers go to stderr.
+"""
+
+import os
+import struct
+import sys
+
+TIMING_FD_ENV = "TIMING_FD"
+
+# One record per order: start_ns, end_ns, ack_ns as little-endian u64.
+# ack_ns is when the exchange's New ack reached the order callback, 0 if the
+# script does not wait for it or it never arrived.
+TIMING_RECORD = struct.Struct("<QQQ")
+
+_timing_fd = int(os.environ[TIMING_FD_ENV]) if TIMING_FD_ENV in os.environ else None
+
+
+def emit_timing(start_ns: int, end_ns: int, ack_ns: int = 0) -> None:
+    """Report one order's perf_counter_ns window and, if known, its ack time."""
+
+    if _timing_fd is not None:
+        os.write(_timing_fd, TIMING_RECORD.pack(start_ns, end_ns, ack_ns))
+        return
+
+    print(f"===START={start_ns}===", file=sys.stderr, flush=True)
+    print(f"===END={end_ns}===", file=sys.stderr, flush=True)
+    print(f"TOTAL_NS={end_ns - start_ns}", file=sys.stderr, flush=True)
+    # Always printed so ACK_NS lines pair up with START/END per order
+    print(f"ACK_NS={ack_ns}", file=sys.stderr, flush=True)
+
+
+def parse_timing_records(data: bytes) -> list:
+    """Decode (start_ns, end_ns, ack_ns) records; a truncated trailing one is ignored."""
+
+    usable = len(data) - len(data) % TIMING_RECORD.size
+    return list(TIMING_RECORD.iter_unpack(data[:usable]))
@@ -0,0 +1,84 @@
+"""Report session retry behaviour (run: python -m unittest discover tests)."""
+
+import socket
+import struct
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from latency_measurement import make_report_session  # noqa: E402
+
+
+def _read_request(conn):
+    """Read one HTTP request (headers plus Content-Length body)."""
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = conn.recv(4096)
+        if not chunk:
+            return data
+        data += chunk
+    head, _, body = data.partition(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    while len(body) < length:
+        body += conn.recv(4096)
+    return head
+
+
+class ResetFirstConnectionServer:
+    """Resets the first connection after reading its request, then answers 200."""
+
+    def __init__(self):
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.requests = []
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        for attempt in range(2):
+            conn, _ = self.sock.accept()
+            with conn:
+                self.requests.append(_read_request(conn))
+                if attempt == 0:
+                    # SO_LINGER 0: close() sends RST, like a dropped keep-alive
+                    conn.setsockopt(
+                        socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+                    )
+                    continue
+                conn.sendall(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n"
+                    b"Connection: close\r\n\r\nok"
+                )
+
+    def close(self):
+        self._thread.join(timeout=5)
+        self.sock.close()
+
+
+class ReportSessionRetryTest(unittest.TestCase):
+    def test_post_is_retried_after_connection_reset(self):
+        server = ResetFirstConnectionServer()
+        session = make_report_session()
+        try:
+            response = session.post(
+                f"http://127.0.0.1:{server.port}/report",
+                data=b'{"latency_ms": 1.0}',
+                timeout=5,
+            )
+        finally:
+            session.close()
+            server.close()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(server.requests), 2)
+        self.assertTrue(all(r.startswith(b"POST ") for r in server.requests))
+
+
+if __name__ == "__main__":
+    unittest.main()
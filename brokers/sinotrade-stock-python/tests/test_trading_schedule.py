@@ -0,0 +1,48 @@
+"""Trading-window scheduling (run: python -m unittest discover tests)."""
+
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from latency_measurement import TAIWAN_TZ, LatencyMeasurement  # noqa: E402
+
+seconds_until_trading_start = LatencyMeasurement.seconds_until_trading_start
+
+
+def taipei(*args):
+    return datetime(*args, tzinfo=TAIWAN_TZ)
+
+
+class SecondsUntilTradingStartTest(unittest.TestCase):
+    def test_before_start_on_a_weekday(self):
+        # Wednesday 08:00 -> 09:00 the same day
+        self.assertEqual(
+            seconds_until_trading_start(taipei(2026, 10, 14, 8, 0), 9, 0), 3600
+        )
+
+    def test_after_start_rolls_to_next_day(self):
+        # Wednesday 09:00 exactly -> Thursday 09:00
+        self.assertEqual(
+            seconds_until_trading_start(taipei(2026, 10, 14, 9, 0), 9, 0), 86400
+        )
+
+    def test_friday_evening_skips_the_weekend(self):
+        # Friday 14:00 -> Monday 09:00
+        self.assertEqual(
+            seconds_until_trading_start(taipei(2026, 10, 16, 14, 0), 9, 0),
+            (2 * 24 + 19) * 3600,
+        )
+
+    def test_saturday_morning_waits_for_monday(self):
+        # Saturday 08:30 -> Monday 09:00
+        self.assertEqual(
+            seconds_until_trading_start(taipei(2026, 10, 17, 8, 30), 9, 0),
+            (2 * 24) * 3600 + 1800,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
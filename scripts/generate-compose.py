@@ -1,83 +1,132 @@
-import yaml
+import tomllib
+import json
+import math
+import re
 import sys
 import os
 
+# The compose schema is fixed, so the YAML is written straight from
+# templates instead of building a dict for yaml.dump. Layout matches what
+# yaml.dump(default_flow_style=False, sort_keys=False) produced.
+SERVICE_TEMPLATE = (
+    "  {name}:\n"
+    "    build:\n"
+    "      context: {context}\n"
+    "      dockerfile: Dockerfile\n"
+    "    container_name: {name}\n"
+    "    environment:\n"
+    "    - {tz}\n"
+    "    network_mode: host\n"
+    "    restart: unless-stopped\n"
+    "    stdin_open: true\n"
+    "    tty: true\n"
+    "    volumes:\n"
+    "    - {certs}\n"
+    "    deploy:\n"
+    "      resources:\n"
+    "        limits:\n"
+    "          cpus: {cpus}\n"
+    "          memory: {memory}\n"
+)
+
+RESERVATIONS_TEMPLATE = (
+    "        reservations:\n"
+    "          cpus: {cpus}\n"
+    "          memory: {memory}\n"
+)
+
+COMPOSE_FOOTER = (
+    "networks:\n"
+    "  streambeaver:\n"
+    "    driver: bridge\n"
+    "volumes:\n"
+    "  logs: null\n"
+    "  data: null\n"
+)
+
+# Plain scalars are only written for a conservative character set that
+# can't start an indicator or end in a mapping ':'; anything else is
+# double-quoted and escaped (JSON string syntax is valid YAML).
+_PLAIN_SAFE_RE = re.compile(r"(?:[A-Za-z0-9_./][A-Za-z0-9_./:=+-]*)?(?<!:)")
+
+# Safe-set strings YAML could still read back as something else (numbers in
+# any base, sexagesimals, dates, bools, null, ''); these are single-quoted,
+# as yaml.dump does
+_AMBIGUOUS_RE = re.compile(
+    r"|[-+]?\.?[0-9][0-9a-fA-FoOxX_.:+\-]*|[0-9]{4}-.*|[-+]?\.(?i:inf|nan)"
+    r"|(?i:true|false|yes|no|on|off|null|y|n)"
+)
+
+
+def yaml_scalar(value):
+    """Render a config value as a YAML scalar."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and not math.isfinite(value):
+        return '.nan' if math.isnan(value) else ('.inf' if value > 0 else '-.inf')
+    if not isinstance(value, str):
+        return str(value)
+    if not _PLAIN_SAFE_RE.fullmatch(value):
+        return json.dumps(value)
+    if _AMBIGUOUS_RE.fullmatch(value):
+        return "'" + value + "'"
+    return value
+
 
 def load_config():
     config_path = os.path.join(os.path.dirname(
         os.path.dirname(__file__)), 'config.toml')
-    try:
-        import tomllib
-    except ImportError:
-        import tomli as tomllib
     with open(config_path, 'rb') as f:
         return tomllib.load(f)
 
 
 def generate_docker_compose(config):
-    compose = {
-        'services': {},
-        'networks': {
-            'streambeaver': {
-                'driver': 'bridge'
-            }
-        },
-        'volumes': {
-            'logs': None,
-            'data': None
-        }
-    }
+    services = []
+    tz = yaml_scalar(f"TZ={config['global']['timezone']}")
 
     for broker_name, broker_config in config['brokers'].items():
         if not broker_config.get('enabled', True):
             continue
 
+        # Broker names are reused in every path and replica name below
+        broker_name = sys.intern(broker_name)
+
         replicas = broker_config.get('replicas', 1)
 
+        # Everything but the service name is the same for every replica, so
+        # render it once per broker
+        fields = {
+            'context': yaml_scalar(f'./brokers/{broker_name}'),
+            'tz': tz,
+            'certs': yaml_scalar(f'./brokers/{broker_name}/certs:/app/certs:ro'),
+            # Resource limits
+            'cpus': yaml_scalar(broker_config.get('cpu_limit', '0.5')),
+            'memory': yaml_scalar(broker_config.get('memory_limit', '256M')),
+        }
+        reservations = ''
+        if 'cpu_reservation' in broker_config:
+            reservations = RESERVATIONS_TEMPLATE.format(
+                cpus=yaml_scalar(broker_config['cpu_reservation']),
+                memory=yaml_scalar(broker_config.get('memory_reservation', '128M'))
+            )
+
         for i in range(replicas):
             service_name = f"{broker_name}-{i+1}" if replicas > 1 else broker_name
+            services.append(
+                SERVICE_TEMPLATE.format(name=yaml_scalar(service_name), **fields)
+            )
+            services.append(reservations)
 
-            service_def = {
-                'build': {
-                    'context': f'./brokers/{broker_name}',
-                    'dockerfile': 'Dockerfile'
-                },
-                'container_name': service_name,
-                'environment': [f"TZ={config['global']['timezone']}"],
-                'network_mode': 'host',
-                'restart': 'unless-stopped',
-                'stdin_open': True,
-                'tty': True,
-                'volumes': [
-                    f'./brokers/{broker_name}/certs:/app/certs:ro'
-                ]
-            }
-
-            # Add resource limits
-            service_def['deploy'] = {
-                'resources': {
-                    'limits': {
-                        'cpus': broker_config.get('cpu_limit', '0.5'),
-                        'memory': broker_config.get('memory_limit', '256M')
-                    }
-                }
-            }
-            if 'cpu_reservation' in broker_config:
-                service_def['deploy']['resources']['reservations'] = {
-                    'cpus': broker_config['cpu_reservation'],
-                    'memory': broker_config.get('memory_reservation', '128M')
-                }
-
-            compose['services'][service_name] = service_def
-
-    return compose
+    if not services:
+        return 'services: {}\n' + COMPOSE_FOOTER
+    return 'services:\n' + ''.join(services) + COMPOSE_FOOTER
 
 
 def main():
     config = load_config()
-    compose = generate_docker_compose(config)
-
-    print(yaml.dump(compose, default_flow_style=False, sort_keys=False))
+    print(generate_docker_compose(config))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,115 @@
+"""Compose emitter round-trips (run: python -m unittest discover scripts/tests)."""
+
+import importlib.util
+import unittest
+from pathlib import Path
+
+import yaml
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "generate-compose.py"
+_spec = importlib.util.spec_from_file_location("generate_compose", _SCRIPT)
+generate_compose = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(generate_compose)
+
+AWKWARD_VALUES = [
+    "x\ny",
+    "a\tb",
+    "=",
+    "<<",
+    "a=b",
+    "",
+    " lead",
+    "trail ",
+    "a: b",
+    "a:",
+    "x #y",
+    "#x",
+    "-x",
+    "it's",
+    'say "hi"',
+    "back\\slash",
+    "\x00\x07\x1b",
+    "café",
+    "~",
+    "null",
+    "True",
+    "off",
+    "y",
+    "1.0",
+    "1e3",
+    "0x1F",
+    "0o17",
+    "1_000",
+    ".5",
+    ".inf",
+    "12:30",
+    "2024-01-01",
+    "[a]",
+    "{a}",
+    "*alias",
+    "&anchor",
+    "!tag",
+    "%dir",
+    "@at",
+    "`tick",
+    "|",
+    ">",
+    "?",
+    "512M",
+    "./brokers/x/certs:/app/certs:ro",
+]
+
+
+def compose_for(value):
+    config = {
+        "global": {"timezone": value},
+        "brokers": {
+            "b": {
+                "replicas": 2,
+                "cpu_limit": value,
+                "memory_limit": value,
+                "cpu_reservation": value,
+                "memory_reservation": value,
+            }
+        },
+    }
+    return yaml.safe_load(generate_compose.generate_docker_compose(config))
+
+
+class YamlScalarRoundTripTest(unittest.TestCase):
+    def test_awkward_strings_load_back_unchanged(self):
+        for value in AWKWARD_VALUES:
+            with self.subTest(value=value):
+                compose = compose_for(value)
+                for name in ("b-1", "b-2"):
+                    service = compose["services"][name]
+                    resources = service["deploy"]["resources"]
+                    self.assertEqual(service["environment"], [f"TZ={value}"])
+                    self.assertEqual(resources["limits"]["cpus"], value)
+                    self.assertEqual(resources["limits"]["memory"], value)
+                    self.assertEqual(resources["reservations"]["cpus"], value)
+                    self.assertEqual(resources["reservations"]["memory"], value)
+
+    def test_non_string_values_keep_their_type(self):
+        for value in (2, 1.5, True, False, None, float("inf"), float("-inf")):
+            with self.subTest(value=value):
+                limits = compose_for(value)["services"]["b-1"]["deploy"]
+                self.assertEqual(limits["resources"]["limits"]["cpus"], value)
+
+    def test_matches_yaml_dump_layout_for_plain_config(self):
+        config = {
+            "global": {"timezone": "Asia/Taipei"},
+            "brokers": {
+                "a": {"cpu_limit": "1.0", "memory_limit": "512M"},
+                "off": {"enabled": False},
+            },
+        }
+        text = generate_compose.generate_docker_compose(config)
+        self.assertIn("    - TZ=Asia/Taipei\n", text)
+        self.assertIn("          cpus: '1.0'\n", text)
+        self.assertIn("          memory: 512M\n", text)
+        self.assertNotIn("off", yaml.safe_load(text)["services"])
+
+
+if __name__ == "__main__":
+    unittest.main()